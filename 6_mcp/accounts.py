@@ -1,14 +1,27 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr, Field
+from typing import Literal
 import json
 from dotenv import load_dotenv
 from datetime import datetime
-from market import get_share_price
-from database import write_account, read_account, write_log
+from market import get_share_price, get_share_prices
+from database import (
+    write_account,
+    write_account_delta,
+    read_transactions,
+    read_transactions_page,
+    read_transaction_count,
+    read_portfolio_values,
+    read_account_version,
+    write_log,
+    transaction,
+)
+from ledger import SNAPSHOT_EVERY, append_events, write_snapshot, replay, apply_event, empty_state
 
 load_dotenv(override=True)
 
 INITIAL_BALANCE = 10_000.0
 SPREAD = 0.002
+RECENT_TRANSACTIONS = 10
 
 
 class Transaction(BaseModel):
@@ -25,46 +38,180 @@ class Transaction(BaseModel):
         return f"{abs(self.quantity)} shares of {self.symbol} at {self.price} each."
 
 
+class Order(BaseModel):
+    action: Literal["buy", "sell"] = Field(description="Whether to buy or sell")
+    symbol: str = Field(description="The symbol of the stock")
+    quantity: int = Field(description="The quantity of shares, a positive number")
+    rationale: str = Field(description="The rationale for the trade and fit with the account's strategy")
+
+
 class Account(BaseModel):
     name: str
     balance: float
     strategy: str
     holdings: dict[str, int]
-    transactions: list[Transaction]
-    portfolio_value_time_series: list[tuple[str, float]]
+
+    # Running aggregates maintained on every trade, see ledger.apply_event
+    cost_basis: dict[str, float] = {}
+    net_invested: float = 0.0
+    realized_pnl: float = 0.0
+
+    # The transactions and value series are only read from the database when first used;
+    # new ones are kept apart until saved, so save() only writes the difference
+    _transactions: list[Transaction] | None = PrivateAttr(default=None)
+    _values: list[tuple[str, float]] | None = PrivateAttr(default=None)
+    _new_transactions: list[Transaction] = PrivateAttr(default_factory=list)
+    _new_values: list[tuple[str, float]] = PrivateAttr(default_factory=list)
+    _replace_history: bool = PrivateAttr(default=False)
+
+    # What is already persisted, so save() only writes the difference
+    _saved_holdings: dict[str, int] = PrivateAttr(default_factory=dict)
+    _version: int = PrivateAttr(default=0)
+
+    # Ledger events not yet persisted, and how many events the latest snapshot is behind
+    _pending_events: list[tuple[str, str, dict]] = PrivateAttr(default_factory=list)
+    _events_since_snapshot: int = PrivateAttr(default=0)
 
     @classmethod
     def get(cls, name: str):
-        fields = read_account(name.lower())
-        if not fields:
-            fields = {
-                "name": name.lower(),
-                "balance": INITIAL_BALANCE,
-                "strategy": "",
-                "holdings": {},
-                "transactions": [],
-                "portfolio_value_time_series": []
-            }
-            write_account(name, fields)
-        return cls(**fields)
-    
-    
+        """ Load an account from the latest ledger snapshot and its tail, without its history. """
+        # Read the version first: a write landing in between leaves it behind the state, not ahead
+        version = read_account_version(name) or 0
+        replayed = replay(name)
+        if not replayed:
+            state = empty_state(INITIAL_BALANCE)
+            with transaction():
+                version = write_account(name, {**state, "transactions": [], "portfolio_value_time_series": []})
+                write_snapshot(name, 0, "", state)
+            account = cls(name=name.lower(), **state)
+            account._transactions, account._values = [], []
+        else:
+            state, _, events_since_snapshot = replayed
+            account = cls(name=name.lower(), **state)
+            account._events_since_snapshot = events_since_snapshot
+        account._version = version
+        account._mark_saved()
+        return account
+
+    @property
+    def transactions(self) -> list[Transaction]:
+        """ Every transaction, oldest first; read in full the first time it is used. """
+        if self._transactions is None:
+            saved = [Transaction(**t) for t in read_transactions(self.name)]
+            self._transactions = saved + self._new_transactions
+        return self._transactions
+
+    @property
+    def portfolio_value_time_series(self) -> list[tuple[str, float]]:
+        """ Every (datetime, value) point, oldest first; read in full the first time it is used. """
+        if self._values is None:
+            self._values = [tuple(value) for value in read_portfolio_values(self.name)] + self._new_values
+        return self._values
+
+    def record_transaction(self, txn: Transaction):
+        self._new_transactions.append(txn)
+        if self._transactions is not None:
+            self._transactions.append(txn)
+
+    def record_value(self, when: str, value: float):
+        self._new_values.append((when, value))
+        if self._values is not None:
+            self._values.append((when, value))
+
+    def recent_transactions(self, limit: int = RECENT_TRANSACTIONS) -> list[Transaction]:
+        """ The latest transactions, oldest first, read as one page rather than the full history. """
+        if self._transactions is not None:
+            return self._transactions[-limit:] if limit > 0 else []
+        page = read_transactions_page(self.name, limit=limit)
+        saved = [Transaction(**{k: v for k, v in t.items() if k != "id"}) for t in reversed(page)]
+        return (saved + self._new_transactions)[-limit:] if limit > 0 else []
+
+    def transaction_count(self) -> int:
+        if self._transactions is not None:
+            return len(self._transactions)
+        return read_transaction_count(self.name) + len(self._new_transactions)
+
+    def _mark_saved(self):
+        self._saved_holdings = dict(self.holdings)
+        self._new_transactions = []
+        self._new_values = []
+        self._replace_history = False
+
+    def _state(self) -> dict:
+        return {
+            "balance": self.balance,
+            "strategy": self.strategy,
+            "holdings": self.holdings,
+            "cost_basis": self.cost_basis,
+            "net_invested": self.net_invested,
+            "realized_pnl": self.realized_pnl,
+        }
+
+    def _apply(self, type: str, **data):
+        """ Apply a ledger event to this account and queue it to be saved. """
+        state = apply_event(self._state(), type, data)
+        for field, value in state.items():
+            setattr(self, field, value)
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._pending_events.append((timestamp, type, data))
+
+    def _save_events(self):
+        if not self._pending_events:
+            return
+        last_id = append_events(self.name, self._pending_events)
+        self._events_since_snapshot += len(self._pending_events)
+        if self._events_since_snapshot >= SNAPSHOT_EVERY:
+            state = {**self._state(), "holdings": dict(self.holdings), "cost_basis": dict(self.cost_basis)}
+            write_snapshot(self.name, last_id, self._pending_events[-1][0], state)
+            self._events_since_snapshot = 0
+        self._pending_events = []
+
+    @property
+    def version(self) -> int:
+        """ The stored version this account matches, as in the accounts table. """
+        return self._version
+
     def save(self):
-        write_account(self.name.lower(), self.model_dump())
+        with transaction():
+            self._version = self._save_changes()
+            self._save_events()
+        self._mark_saved()
+
+    def _save_changes(self) -> int:
+        new_transactions = [t.model_dump() for t in self._new_transactions]
+        if self._replace_history:
+            return write_account(self.name.lower(), {
+                **self.model_dump(),
+                "transactions": new_transactions,
+                "portfolio_value_time_series": self._new_values,
+            })
+        else:
+            changed = {
+                symbol: self.holdings.get(symbol, 0)
+                for symbol in self.holdings.keys() | self._saved_holdings.keys()
+                if self.holdings.get(symbol, 0) != self._saved_holdings.get(symbol, 0)
+            }
+            return write_account_delta(
+                self.name,
+                self.balance,
+                self.strategy,
+                changed,
+                new_transactions,
+                self._new_values,
+            )
 
     def reset(self, strategy: str):
-        self.balance = INITIAL_BALANCE
-        self.strategy = strategy
-        self.holdings = {}
-        self.transactions = []
-        self.portfolio_value_time_series = []
+        self._transactions, self._values = [], []
+        self._new_transactions, self._new_values = [], []
+        self._replace_history = True
+        self._apply("reset", balance=INITIAL_BALANCE, strategy=strategy)
         self.save()
 
     def deposit(self, amount: float):
         """ Deposit funds into the account. """
         if amount <= 0:
             raise ValueError("Deposit amount must be positive.")
-        self.balance += amount
+        self._apply("deposit", amount=amount)
         print(f"Deposited ${amount}. New balance: ${self.balance}")
         self.save()
 
@@ -72,11 +219,11 @@ class Account(BaseModel):
         """ Withdraw funds from the account, ensuring it doesn't go negative. """
         if amount > self.balance:
             raise ValueError("Insufficient funds for withdrawal.")
-        self.balance -= amount
+        self._apply("withdraw", amount=amount)
         print(f"Withdrew ${amount}. New balance: ${self.balance}")
         self.save()
 
-    def buy_shares(self, symbol: str, quantity: int, rationale: str) -> str:
+    def buy_shares(self, symbol: str, quantity: int, rationale: str, detail: str = "full") -> str:
         """ Buy shares of a stock if sufficient funds are available. """
         price = get_share_price(symbol)
         buy_price = price * (1 + SPREAD)
@@ -87,56 +234,129 @@ class Account(BaseModel):
         elif price==0:
             raise ValueError(f"Unrecognized symbol {symbol}")
         
-        # Update holdings
-        self.holdings[symbol] = self.holdings.get(symbol, 0) + quantity
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         # Record transaction
-        transaction = Transaction(symbol=symbol, quantity=quantity, price=buy_price, timestamp=timestamp, rationale=rationale)
-        self.transactions.append(transaction)
+        txn = Transaction(symbol=symbol, quantity=quantity, price=buy_price, timestamp=timestamp, rationale=rationale)
+        self.record_transaction(txn)
         
-        # Update balance
-        self.balance -= total_cost
+        # Update holdings, balance and cost basis
+        self._apply("buy", symbol=symbol, quantity=quantity, price=buy_price, rationale=rationale)
         self.save()
         write_log(self.name, "account", f"Bought {quantity} of {symbol}")
-        return "Completed. Latest details:\n" + self.report()
+        return "Completed. Latest details:\n" + self.report(detail)
 
-    def sell_shares(self, symbol: str, quantity: int, rationale: str) -> str:
+    def sell_shares(self, symbol: str, quantity: int, rationale: str, detail: str = "full") -> str:
         """ Sell shares of a stock if the user has enough shares. """
         if self.holdings.get(symbol, 0) < quantity:
             raise ValueError(f"Cannot sell {quantity} shares of {symbol}. Not enough shares held.")
         
         price = get_share_price(symbol)
         sell_price = price * (1 - SPREAD)
-        total_proceeds = sell_price * quantity
-        
-        # Update holdings
-        self.holdings[symbol] -= quantity
         
-        # If shares are completely sold, remove from holdings
-        if self.holdings[symbol] == 0:
-            del self.holdings[symbol]
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         # Record transaction
-        transaction = Transaction(symbol=symbol, quantity=-quantity, price=sell_price, timestamp=timestamp, rationale=rationale)  # negative quantity for sell
-        self.transactions.append(transaction)
+        txn = Transaction(symbol=symbol, quantity=-quantity, price=sell_price, timestamp=timestamp, rationale=rationale)  # negative quantity for sell
+        self.record_transaction(txn)
 
-        # Update balance
-        self.balance += total_proceeds
+        # Update holdings (removing them when completely sold), balance and realized P&L
+        self._apply("sell", symbol=symbol, quantity=quantity, price=sell_price, rationale=rationale)
         self.save()
         write_log(self.name, "account", f"Sold {quantity} of {symbol}")
-        return "Completed. Latest details:\n" + self.report()
+        return "Completed. Latest details:\n" + self.report(detail)
 
-    def calculate_portfolio_value(self):
-        """ Calculate the total value of the user's portfolio. """
+    def execute_batch(self, orders: list[Order]) -> str:
+        """
+        Execute several orders as one: all legs are priced in a single lookup and checked
+        together, then applied and saved in one transaction, or none are if any leg fails.
+        Sells go first, so their proceeds can fund the buys.
+        """
+        if not orders:
+            raise ValueError("No orders to execute.")
+        orders = sorted(orders, key=lambda order: order.action != "sell")
+        symbols = {order.symbol for order in orders} | self.holdings.keys()
+        prices = get_share_prices(symbols)
+
+        balance, holdings, problems = self.balance, dict(self.holdings), []
+        for order in orders:
+            price = prices[order.symbol]
+            if order.quantity <= 0:
+                problems.append(f"{order.action} {order.symbol}: quantity must be positive")
+            elif price == 0:
+                problems.append(f"{order.action} {order.symbol}: unrecognized symbol")
+            elif order.action == "sell" and holdings.get(order.symbol, 0) < order.quantity:
+                problems.append(f"sell {order.symbol}: only {holdings.get(order.symbol, 0)} shares held")
+            elif order.action == "buy" and order.quantity * price * (1 + SPREAD) > balance:
+                problems.append(f"buy {order.symbol}: insufficient funds")
+            elif order.action == "sell":
+                balance += order.quantity * price * (1 - SPREAD)
+                holdings[order.symbol] -= order.quantity
+            else:
+                balance -= order.quantity * price * (1 + SPREAD)
+                holdings[order.symbol] = holdings.get(order.symbol, 0) + order.quantity
+        if problems:
+            raise ValueError("No orders executed. " + "; ".join(problems))
+
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        executed = []
+        for order in orders:
+            sign = 1 if order.action == "buy" else -1
+            price = prices[order.symbol] * (1 + sign * SPREAD)
+            self.record_transaction(Transaction(symbol=order.symbol, quantity=sign * order.quantity, price=price, timestamp=timestamp, rationale=order.rationale))
+            self._apply(order.action, symbol=order.symbol, quantity=order.quantity, price=price, rationale=order.rationale)
+            executed.append({"action": order.action, "symbol": order.symbol, "quantity": order.quantity, "price": round(price, 4)})
+        portfolio_value = self.calculate_portfolio_value(prices)
+        self.record_value(timestamp, portfolio_value)
+        self.save()
+        for order in orders:
+            write_log(self.name, "account", f"{'Bought' if order.action == 'buy' else 'Sold'} {order.quantity} of {order.symbol}")
+        return json.dumps({
+            "executed": executed,
+            "balance": self.balance,
+            "holdings": self.holdings,
+            "total_portfolio_value": portfolio_value,
+            "total_profit_loss": self.calculate_profit_loss(portfolio_value),
+        })
+
+    def calculate_portfolio_value(self, prices: dict[str, float] | None = None):
+        """ Calculate the total value of the user's portfolio, pricing all holdings in one batch. """
+        if prices is None:
+            prices = get_share_prices(self.holdings)
         total_value = self.balance
         for symbol, quantity in self.holdings.items():
-            total_value += get_share_price(symbol) * quantity
+            total_value += prices[symbol] * quantity
         return total_value
 
     def calculate_profit_loss(self, portfolio_value: float):
         """ Calculate profit or loss from the initial spend. """
-        initial_spend = sum(transaction.total() for transaction in self.transactions)
-        return portfolio_value - initial_spend - self.balance
+        return portfolio_value - self.net_invested - self.balance
+
+    def calculate_unrealized_profit_loss(self, prices: dict[str, float]):
+        """ Calculate the paper profit or loss of current holdings against their average cost. """
+        return sum(
+            quantity * (prices[symbol] - self.cost_basis.get(symbol, 0.0))
+            for symbol, quantity in self.holdings.items()
+        )
+
+    def recompute_aggregates(self) -> dict:
+        """ Recompute the running aggregates from scratch over the full transaction history. """
+        state = empty_state()
+        for txn in self.transactions:
+            type = "buy" if txn.quantity > 0 else "sell"
+            data = {"symbol": txn.symbol, "quantity": abs(txn.quantity), "price": txn.price}
+            apply_event(state, type, data)
+        return {field: state[field] for field in ("holdings", "cost_basis", "net_invested", "realized_pnl")}
+
+    def check_aggregates(self, tolerance: float = 1e-6):
+        """ Raise if the running aggregates disagree with a full recomputation. """
+        expected = self.recompute_aggregates()
+        if expected["holdings"] != self.holdings:
+            raise ValueError(f"Holdings {self.holdings} do not match transactions {expected['holdings']}")
+        for field in ("net_invested", "realized_pnl"):
+            if abs(expected[field] - getattr(self, field)) > tolerance:
+                raise ValueError(f"{field} is {getattr(self, field)}, expected {expected[field]}")
+        for symbol, cost in expected["cost_basis"].items():
+            if abs(cost - self.cost_basis.get(symbol, 0.0)) > tolerance:
+                raise ValueError(f"Cost basis of {symbol} is {self.cost_basis.get(symbol)}, expected {cost}")
 
     def get_holdings(self):
         """ Report the current holdings of the user. """
@@ -144,19 +364,32 @@ class Account(BaseModel):
 
     def get_profit_loss(self):
         """ Report the user's profit or loss at any point in time. """
-        return self.calculate_profit_loss()
+        return self.calculate_profit_loss(self.calculate_portfolio_value())
 
     def list_transactions(self):
         """ List all transactions made by the user. """
-        return [transaction.model_dump() for transaction in self.transactions]
+        return [txn.model_dump() for txn in self.transactions]
     
-    def report(self) -> str:
-        """ Return a json string representing the account.  """
+    def report(self, detail: str = "full", max_transactions: int = RECENT_TRANSACTIONS) -> str:
+        """
+        Return a json string representing the account.
+        detail is "summary" for balances, holdings and P&L only, "recent" to add the last
+        max_transactions transactions, or "full" for everything including the value history.
+        """
+        if detail not in ("summary", "recent", "full"):
+            raise ValueError(f"Unknown report detail {detail}")
         portfolio_value = self.calculate_portfolio_value()
-        self.portfolio_value_time_series.append((datetime.now().strftime("%Y-%m-%d %H:%M:%S"), portfolio_value))
+        self.record_value(datetime.now().strftime("%Y-%m-%d %H:%M:%S"), portfolio_value)
         self.save()
         pnl = self.calculate_profit_loss(portfolio_value)
         data = self.model_dump()
+        if detail == "full":
+            data["transactions"] = self.list_transactions()
+            data["portfolio_value_time_series"] = self.portfolio_value_time_series
+        else:
+            data["transaction_count"] = self.transaction_count()
+            if detail == "recent" and max_transactions > 0:
+                data["recent_transactions"] = [t.model_dump() for t in self.recent_transactions(max_transactions)]
         data["total_portfolio_value"] = portfolio_value
         data["total_profit_loss"] = pnl
         write_log(self.name, "account", f"Retrieved account details")
@@ -169,7 +402,7 @@ class Account(BaseModel):
     
     def change_strategy(self, strategy: str) -> str:
         """ At your discretion, if you choose to, call this to change your investment strategy for the future """
-        self.strategy = strategy
+        self._apply("strategy", strategy=strategy)
         self.save()
         write_log(self.name, "account", f"Changed strategy")
         return "Changed strategy"
@@ -2,38 +2,162 @@ import mcp
 from mcp.client.stdio import stdio_client
 from mcp import StdioServerParameters
 from agents import FunctionTool
+from dotenv import load_dotenv
+import asyncio
 import json
+import os
+
+load_dotenv(override=True)
 
 params = StdioServerParameters(command="uv", args=["run", "accounts_server.py"], env=None)
 
+POOL_SIZE = int(os.getenv("ACCOUNTS_CLIENT_POOL_SIZE", "2"))
+MAX_CONCURRENCY = int(os.getenv("ACCOUNTS_CLIENT_MAX_CONCURRENCY", "8"))
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("ACCOUNTS_CLIENT_TIMEOUT_SECONDS", "60"))
+PROBE_TIMEOUT_SECONDS = 5
+
+
+class _Connection:
+    """
+    One long-lived stdio session. The stdio transport must be entered and exited in the
+    same task, so the session lives in a background task that holds it open until closed.
+    """
+
+    def __init__(self, params: StdioServerParameters):
+        self.params = params
+        self.session: mcp.ClientSession | None = None
+        self._closing = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def open(self) -> None:
+        ready = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run(ready))
+        self.session = await ready
+
+    async def _run(self, ready: asyncio.Future) -> None:
+        try:
+            async with stdio_client(self.params) as streams:
+                async with mcp.ClientSession(*streams) as session:
+                    await session.initialize()
+                    ready.set_result(session)
+                    await self._closing.wait()
+        except BaseException as e:
+            if not ready.done():
+                ready.set_exception(e)
+        finally:
+            self.session = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def close(self) -> None:
+        self._closing.set()
+        if self._task:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+class SessionPool:
+    """
+    A small pool of warm MCP client sessions to one stdio server.
+
+    Sessions are opened on first use and kept for the life of the event loop. Requests are
+    spread round-robin over the sessions, at most `max_concurrency` in flight. When a request
+    fails and its server no longer answers, the session is replaced, and reads are
+    retried once on the new one. Tool calls are not retried, as a trade may have gone through.
+    """
+
+    def __init__(self, params: StdioServerParameters, size: int = POOL_SIZE, max_concurrency: int = MAX_CONCURRENCY):
+        self.params = params
+        self.size = size
+        self.max_concurrency = max_concurrency
+        self.connects = 0
+        self.reconnects = 0
+        self._loop = None
+
+    def _reset(self) -> None:
+        # Sessions and locks belong to the loop that created them, so a new loop starts afresh
+        self._loop = asyncio.get_running_loop()
+        self._slots: list[_Connection | None] = [None] * self.size
+        self._slot_locks = [asyncio.Lock() for _ in range(self.size)]
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._next = 0
+
+    async def _connection(self, slot: int) -> _Connection:
+        async with self._slot_locks[slot]:
+            connection = self._slots[slot]
+            if connection is None or not connection.alive:
+                if connection is not None:
+                    self.reconnects += 1
+                    await connection.close()
+                connection = _Connection(self.params)
+                await connection.open()
+                self.connects += 1
+                self._slots[slot] = connection
+            return connection
+
+    async def run(self, request, retry: bool = True):
+        """Await request(session) on a pooled session and return its result."""
+        if self._loop is not asyncio.get_running_loop():
+            self._reset()
+        slot = self._next
+        self._next = (self._next + 1) % self.size
+        async with self._semaphore:
+            for attempt in range(2):
+                connection = await self._connection(slot)
+                try:
+                    return await asyncio.wait_for(request(connection.session), REQUEST_TIMEOUT_SECONDS)
+                except Exception:
+                    if await self._healthy(connection) or attempt or not retry:
+                        raise
+
+    async def _healthy(self, connection: _Connection) -> bool:
+        """Probe a session after a failed request; close it if the server has gone away."""
+        try:
+            await asyncio.wait_for(connection.session.list_tools(), PROBE_TIMEOUT_SECONDS)
+            return True
+        except Exception:
+            await connection.close()
+            return False
+
+    async def close(self) -> None:
+        if self._loop is not asyncio.get_running_loop():
+            return
+        for connection in self._slots:
+            if connection is not None:
+                await connection.close()
+        self._slots = [None] * self.size
+
+
+pool = SessionPool(params)
+
+
+async def _run(request, session=None, retry=True):
+    # Callers that already hold an accounts server session (a running trader) use it directly
+    return await request(session) if session is not None else await pool.run(request, retry)
+
+
+async def list_accounts_tools(session=None):
+    async def request(session):
+        tools_result = await session.list_tools()
+        return tools_result.tools
+    return await _run(request, session)
+
+async def call_accounts_tool(tool_name, tool_args, session=None):
+    return await _run(lambda session: session.call_tool(tool_name, tool_args), session, retry=False)
+
+async def read_accounts_resource(name, session=None, full=False):
+    uri = f"accounts://accounts_server/{name}/full" if full else f"accounts://accounts_server/{name}"
+    async def request(session):
+        result = await session.read_resource(uri)
+        return result.contents[0].text
+    return await _run(request, session)
 
-async def list_accounts_tools():
-    async with stdio_client(params) as streams:
-        async with mcp.ClientSession(*streams) as session:
-            await session.initialize()
-            tools_result = await session.list_tools()
-            return tools_result.tools
-        
-async def call_accounts_tool(tool_name, tool_args):
-    async with stdio_client(params) as streams:
-        async with mcp.ClientSession(*streams) as session:
-            await session.initialize()
-            result = await session.call_tool(tool_name, tool_args)
-            return result
-            
-async def read_accounts_resource(name):
-    async with stdio_client(params) as streams:
-        async with mcp.ClientSession(*streams) as session:
-            await session.initialize()
-            result = await session.read_resource(f"accounts://accounts_server/{name}")
-            return result.contents[0].text
-        
-async def read_strategy_resource(name):
-    async with stdio_client(params) as streams:
-        async with mcp.ClientSession(*streams) as session:
-            await session.initialize()
-            result = await session.read_resource(f"accounts://strategy/{name}")
-            return result.contents[0].text
+async def read_strategy_resource(name, session=None):
+    async def request(session):
+        result = await session.read_resource(f"accounts://strategy/{name}")
+        return result.contents[0].text
+    return await _run(request, session)
 
 async def get_accounts_tools_openai():
     openai_tools = []
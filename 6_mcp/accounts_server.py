@@ -1,8 +1,43 @@
 from mcp.server.fastmcp import FastMCP
-from accounts import Account
+from accounts import Account, Order
+from database import data_version, read_account_version
+from timeseries import get_portfolio_series
 
 mcp = FastMCP("accounts_server")
 
+# Reports returned to agents list only the latest transactions, so their size stays flat as
+# the history grows; accounts://accounts_server/{name}/full has everything
+REPORT_DETAIL = "recent"
+
+# Accounts stay in memory between tool calls. A cached account is reused as long as no other
+# connection has committed since it was last checked (PRAGMA data_version), or failing that,
+# as long as its version in the accounts table is unchanged. Writes go through the cached
+# Account, which saves them straight away and keeps its version current.
+
+_accounts: dict[str, tuple[Account, int]] = {}
+
+
+def get_account(name: str) -> Account:
+    name = name.lower()
+    current = data_version()
+    if name in _accounts:
+        account, checked = _accounts[name]
+        if checked == current or read_account_version(name) == account.version:
+            _accounts[name] = (account, current)
+            return account
+    account = Account.get(name)
+    _accounts[name] = (account, current)
+    return account
+
+
+def _update(name: str, change):
+    # A failed change may leave the cached account partly applied, so drop it
+    try:
+        return change(get_account(name))
+    except Exception:
+        _accounts.pop(name.lower(), None)
+        raise
+
 @mcp.tool()
 async def get_balance(name: str) -> float:
     """Get the cash balance of the given account name.
@@ -10,7 +45,7 @@ async def get_balance(name: str) -> float:
     Args:
         name: The name of the account holder
     """
-    return Account.get(name).balance
+    return get_account(name).balance
 
 @mcp.tool()
 async def get_holdings(name: str) -> dict[str, int]:
@@ -19,7 +54,7 @@ async def get_holdings(name: str) -> dict[str, int]:
     Args:
         name: The name of the account holder
     """
-    return Account.get(name).holdings
+    return get_account(name).holdings
 
 @mcp.tool()
 async def buy_shares(name: str, symbol: str, quantity: int, rationale: str) -> float:
@@ -31,7 +66,7 @@ async def buy_shares(name: str, symbol: str, quantity: int, rationale: str) -> f
         quantity: The quantity of shares to buy
         rationale: The rationale for the purchase and fit with the account's strategy
     """
-    return Account.get(name).buy_shares(symbol, quantity, rationale)
+    return _update(name, lambda account: account.buy_shares(symbol, quantity, rationale, REPORT_DETAIL))
 
 
 @mcp.tool()
@@ -44,7 +79,30 @@ async def sell_shares(name: str, symbol: str, quantity: int, rationale: str) ->
         quantity: The quantity of shares to sell
         rationale: The rationale for the sale and fit with the account's strategy
     """
-    return Account.get(name).sell_shares(symbol, quantity, rationale)
+    return _update(name, lambda account: account.sell_shares(symbol, quantity, rationale, REPORT_DETAIL))
+
+@mcp.tool()
+async def place_orders(name: str, orders: list[Order]) -> str:
+    """Buy and sell several stocks at once. The orders are priced together and either all
+    execute or none do; sells execute first, so their proceeds can pay for the buys.
+
+    Args:
+        name: The name of the account holder
+        orders: The orders, each an action (buy or sell), symbol, quantity and rationale
+    """
+    return _update(name, lambda account: account.execute_batch(orders))
+
+@mcp.tool()
+async def get_portfolio_history(name: str, start: str = "", end: str = "", max_points: int = 50) -> list[tuple[str, float]]:
+    """Get the total portfolio value of the given account name over time, downsampled to at most max_points.
+
+    Args:
+        name: The name of the account holder
+        start: The earliest time, as YYYY-MM-DD HH:MM:SS; empty for the whole history
+        end: The latest time, as YYYY-MM-DD HH:MM:SS; empty for now
+        max_points: The most points to return
+    """
+    return get_portfolio_series(name, start or None, end or None, max_points)
 
 @mcp.tool()
 async def change_strategy(name: str, strategy: str) -> str:
@@ -54,17 +112,19 @@ async def change_strategy(name: str, strategy: str) -> str:
         name: The name of the account holder
         strategy: The new strategy for the account
     """
-    return Account.get(name).change_strategy(strategy)
+    return _update(name, lambda account: account.change_strategy(strategy))
 
 @mcp.resource("accounts://accounts_server/{name}")
 async def read_account_resource(name: str) -> str:
-    account = Account.get(name.lower())
-    return account.report()
+    return _update(name, lambda account: account.report(REPORT_DETAIL))
+
+@mcp.resource("accounts://accounts_server/{name}/full")
+async def read_full_account_resource(name: str) -> str:
+    return _update(name, lambda account: account.report("full"))
 
 @mcp.resource("accounts://strategy/{name}")
 async def read_strategy_resource(name: str) -> str:
-    account = Account.get(name.lower())
-    return account.get_strategy()
+    return get_account(name).get_strategy()
 
 if __name__ == "__main__":
     mcp.run(transport='stdio')
\ No newline at end of file
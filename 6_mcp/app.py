@@ -1,10 +1,11 @@
 import gradio as gr
+import threading
 from util import css, js, Color
 import pandas as pd
 from trading_floor import names, lastnames, short_model_names
-import plotly.express as px
-from accounts import Account
-from database import read_log
+import plotly.graph_objects as go
+from database import read_transactions_page
+from snapshot_service import SnapshotService, PRICE_REFRESH_SECONDS, TRANSACTIONS_PAGE
 
 mapper = {
     "trace": Color.WHITE,
@@ -15,47 +16,68 @@ mapper = {
     "account": Color.RED,
 }
 
+TRANSACTION_HEADERS = ["Timestamp", "Symbol", "Quantity", "Price", "Rationale"]
+NEWEST_FIRST, OLDEST_FIRST = "Newest first", "Oldest first"
+
+
+def transactions_query(symbol: str = "", start: str = "", end: str = "", order: str = NEWEST_FIRST) -> dict:
+    """A session's view of the transactions table; cursors holds the cursor of each page visited."""
+    return {
+        "symbol": symbol.strip(),
+        "start": start.strip(),
+        "end": end.strip(),
+        "newest_first": order != OLDEST_FIRST,
+        "cursors": [None],
+    }
+
 
 class Trader:
-    def __init__(self, name: str, lastname: str, model_name: str):
+    def __init__(self, name: str, lastname: str, model_name: str, service: SnapshotService):
         self.name = name
         self.lastname = lastname
         self.model_name = model_name
-        self.account = Account.get(name)
+        self.service = service
+        self.chart_lock = threading.Lock()
+        self.chart_layout = None
+        self.chart_version = None
+        self.chart = None
 
-    def reload(self):
-        self.account = Account.get(self.name)
+    @property
+    def snapshot(self):
+        return self.service.get(self.name)
 
     def get_title(self) -> str:
         return f"<div style='text-align: center;font-size:34px;'>{self.name}<span style='color:#ccc;font-size:24px;'> ({self.model_name}) - {self.lastname}</span></div>"
 
     def get_strategy(self) -> str:
-        return self.account.get_strategy()
-
-    def get_portfolio_value_df(self) -> pd.DataFrame:
-        df = pd.DataFrame(self.account.portfolio_value_time_series, columns=["datetime", "value"])
-        df["datetime"] = pd.to_datetime(df["datetime"])
-        return df
+        return self.snapshot.strategy
 
     def get_portfolio_value_chart(self):
-        df = self.get_portfolio_value_df()
-        fig = px.line(df, x="datetime", y="value")
-        margin = dict(l=40, r=20, t=20, b=40)
-        fig.update_layout(
-            height=300,
-            margin=margin,
-            xaxis_title=None,
-            yaxis_title=None,
-            paper_bgcolor="#bbb",
-            plot_bgcolor="#dde",
-        )
-        fig.update_xaxes(tickformat="%m/%d", tickangle=45, tickfont=dict(size=8))
-        fig.update_yaxes(tickfont=dict(size=8), tickformat=",.0f")
-        return fig
+        """
+        The chart of the snapshot's downsampled series, built once per series version and
+        shared by every page.
+        """
+        snapshot = self.snapshot
+        with self.chart_lock:
+            if self.chart_version == snapshot.series_version:
+                return self.chart
+            if self.chart_layout is None:
+                self.chart_layout = go.Layout(
+                    height=300,
+                    margin=dict(l=40, r=20, t=20, b=40),
+                    paper_bgcolor="#bbb",
+                    plot_bgcolor="#dde",
+                    xaxis=dict(type="date", tickformat="%m/%d", tickangle=45, tickfont=dict(size=8)),
+                    yaxis=dict(tickfont=dict(size=8), tickformat=",.0f"),
+                )
+            x, y = zip(*snapshot.series) if snapshot.series else ((), ())
+            self.chart = go.Figure(data=[go.Scatter(x=x, y=y, mode="lines")], layout=self.chart_layout)
+            self.chart_version = snapshot.series_version
+            return self.chart
 
     def get_holdings_df(self) -> pd.DataFrame:
         """Convert holdings to DataFrame for display"""
-        holdings = self.account.get_holdings()
+        holdings = self.snapshot.holdings
         if not holdings:
             return pd.DataFrame(columns=["Symbol", "Quantity"])
 
@@ -64,33 +86,45 @@ class Trader:
         )
         return df
 
-    def get_transactions_df(self) -> pd.DataFrame:
-        """Convert transactions to DataFrame for display"""
-        transactions = self.account.list_transactions()
+    def get_transactions_page(self, query: dict) -> list[dict]:
+        # Unfiltered, the newest page is what most viewers look at, and the snapshot already has it
+        if query == transactions_query():
+            return self.snapshot.transactions
+        return read_transactions_page(
+            self.name,
+            query["cursors"][-1],
+            TRANSACTIONS_PAGE,
+            query["newest_first"],
+            query["symbol"],
+            query["start"],
+            query["end"],
+        )
+
+    def get_transactions_df(self, query: dict | None = None) -> pd.DataFrame:
+        """Convert one page of transactions to DataFrame for display"""
+        transactions = self.get_transactions_page(query or transactions_query())
         if not transactions:
-            return pd.DataFrame(columns=["Timestamp", "Symbol", "Quantity", "Price", "Rationale"])
+            return pd.DataFrame(columns=TRANSACTION_HEADERS)
 
-        return pd.DataFrame(transactions)
+        df = pd.DataFrame(transactions, columns=["timestamp", "symbol", "quantity", "price", "rationale"])
+        df.columns = TRANSACTION_HEADERS
+        return df
 
     def get_portfolio_value(self) -> str:
-        """Calculate total portfolio value based on current prices"""
-        portfolio_value = self.account.calculate_portfolio_value() or 0.0
-        pnl = self.account.calculate_profit_loss(portfolio_value) or 0.0
+        """Show the total portfolio value as of the service's last pricing"""
+        portfolio_value = self.snapshot.portfolio_value or 0.0
+        pnl = self.snapshot.profit_loss or 0.0
         color = "green" if pnl >= 0 else "red"
         emoji = "⬆" if pnl >= 0 else "⬇"
         return f"<div style='text-align: center;background-color:{color};'><span style='font-size:32px'>${portfolio_value:,.0f}</span><span style='font-size:24px'>&nbsp;&nbsp;&nbsp;{emoji}&nbsp;${pnl:,.0f}</span></div>"
 
-    def get_logs(self, previous=None) -> str:
-        logs = read_log(self.name, last_n=13)
-        response = ""
-        for log in logs:
-            timestamp, type, message = log
+    def get_logs(self) -> str:
+        lines = []
+        for _, timestamp, type, message in self.snapshot.log_lines:
             color = mapper.get(type, Color.WHITE).value
-            response += f"<span style='color:{color}'>{timestamp} : [{type}] {message}</span><br/>"
-        response = f"<div style='height:250px; overflow-y:auto;'>{response}</div>"
-        if response != previous:
-            return response
-        return gr.update()
+            lines.append(f"<span style='color:{color}'>{timestamp} : [{type}] {message}</span><br/>")
+        response = "".join(lines)
+        return f"<div style='height:250px; overflow-y:auto;'>{response}</div>"
 
 
 class TraderView:
@@ -100,6 +134,8 @@ class TraderView:
         self.chart = None
         self.holdings_table = None
         self.transactions_table = None
+        self.transactions_query = None
+        self.transactions_version = None
 
     def make_ui(self):
         with gr.Column():
@@ -125,62 +161,117 @@ class TraderView:
             with gr.Row():
                 self.transactions_table = gr.Dataframe(
                     value=self.trader.get_transactions_df,
-                    label="Recent Transactions",
-                    headers=["Timestamp", "Symbol", "Quantity", "Price", "Rationale"],
+                    label="Transactions",
+                    headers=TRANSACTION_HEADERS,
                     row_count=(5, "dynamic"),
                     col_count=5,
                     max_height=300,
                     elem_classes=["dataframe-fix"],
                 )
+            with gr.Row():
+                symbol = gr.Textbox(placeholder="Symbol", show_label=False, min_width=60)
+                start = gr.Textbox(placeholder="From YYYY-MM-DD", show_label=False, min_width=60)
+                end = gr.Textbox(placeholder="To YYYY-MM-DD", show_label=False, min_width=60)
+                order = gr.Dropdown([NEWEST_FIRST, OLDEST_FIRST], value=NEWEST_FIRST, show_label=False, min_width=60)
+            with gr.Row():
+                previous_page = gr.Button("◀", size="sm")
+                next_page = gr.Button("▶", size="sm")
+            self.transactions_query = gr.State(transactions_query())
+            # Set by the stream when the account changes, so each session refreshes its own page
+            self.transactions_version = gr.Number(visible=False)
 
-        timer = gr.Timer(value=120)
-        timer.tick(
-            fn=self.refresh,
-            inputs=[],
-            outputs=[
-                self.portfolio_value,
-                self.chart,
-                self.holdings_table,
-                self.transactions_table,
-            ],
+        table_outputs = [self.transactions_table, self.transactions_query]
+        gr.on(
+            [symbol.submit, start.submit, end.submit, order.change],
+            self.filter_transactions,
+            inputs=[symbol, start, end, order],
+            outputs=table_outputs,
             show_progress="hidden",
-            queue=False,
         )
-        log_timer = gr.Timer(value=0.5)
-        log_timer.tick(
-            fn=self.trader.get_logs,
-            inputs=[self.log],
-            outputs=[self.log],
+        next_page.click(self.next_transactions, inputs=[self.transactions_query], outputs=table_outputs, show_progress="hidden")
+        previous_page.click(self.previous_transactions, inputs=[self.transactions_query], outputs=table_outputs, show_progress="hidden")
+        self.transactions_version.change(
+            self.trader.get_transactions_df,
+            inputs=[self.transactions_query],
+            outputs=[self.transactions_table],
             show_progress="hidden",
-            queue=False,
         )
 
-    def refresh(self):
-        self.trader.reload()
-        return (
-            self.trader.get_portfolio_value(),
-            self.trader.get_portfolio_value_chart(),
-            self.trader.get_holdings_df(),
-            self.trader.get_transactions_df(),
-        )
+    def filter_transactions(self, symbol: str, start: str, end: str, order: str):
+        query = transactions_query(symbol, start, end, order)
+        return self.trader.get_transactions_df(query), query
+
+    def next_transactions(self, query: dict):
+        page = self.trader.get_transactions_page(query)
+        if len(page) == TRANSACTIONS_PAGE:
+            following = {**query, "cursors": query["cursors"] + [page[-1]["id"]]}
+            if self.trader.get_transactions_page(following):
+                return self.trader.get_transactions_df(following), following
+        return gr.update(), query
+
+    def previous_transactions(self, query: dict):
+        if len(query["cursors"]) == 1:
+            return gr.update(), query
+        query = {**query, "cursors": query["cursors"][:-1]}
+        return self.trader.get_transactions_df(query), query
+
+    def outputs(self) -> list:
+        return [self.portfolio_value, self.chart, self.log, self.holdings_table, self.transactions_version]
+
+    def seen(self) -> dict:
+        snapshot = self.trader.snapshot
+        return {"log_id": snapshot.log_id, "version": snapshot.version, "priced_at": snapshot.priced_at, "series_version": snapshot.series_version}
+
+    def updates(self, seen: dict) -> list:
+        """Updates for outputs(), re-rendering only what changed since this page last saw it."""
+        snapshot = self.trader.snapshot
+        value, chart, logs, holdings, version = [gr.update()] * 5
+        if snapshot.log_id != seen["log_id"]:
+            logs = self.trader.get_logs()
+        if snapshot.series_version != seen["series_version"]:
+            chart = self.trader.get_portfolio_value_chart()
+        if snapshot.version != seen["version"]:
+            holdings, version = self.trader.get_holdings_df(), snapshot.version
+        if snapshot.version != seen["version"] or snapshot.priced_at != seen["priced_at"]:
+            value = self.trader.get_portfolio_value()
+        seen.update(self.seen())
+        return [value, chart, logs, holdings, version]
 
 
 # Main UI construction
 def create_ui():
     """Create the main Gradio UI for the trading simulation"""
 
+    service = SnapshotService(names).start()
     traders = [
-        Trader(trader_name, lastname, model_name)
+        Trader(trader_name, lastname, model_name, service)
         for trader_name, lastname, model_name in zip(names, lastnames, short_model_names)
     ]
     trader_views = [TraderView(trader) for trader in traders]
 
+    async def stream():
+        # Each page subscribes once and wakes after the service has refreshed its snapshots;
+        # rendering reads only those, never the database or the market
+        seen = [view.seen() for view in trader_views]
+        async for _ in service.subscribe(timeout=PRICE_REFRESH_SECONDS):
+            updates = []
+            for view, view_seen in zip(trader_views, seen):
+                updates += view.updates(view_seen)
+            yield updates
+
     with gr.Blocks(
         title="Traders", css=css, js=js, theme=gr.themes.Default(primary_hue="sky"), fill_width=True
     ) as ui:
         with gr.Row():
             for trader_view in trader_views:
                 trader_view.make_ui()
+        ui.load(
+            stream,
+            inputs=None,
+            outputs=[output for view in trader_views for output in view.outputs()],
+            show_progress="hidden",
+            concurrency_limit=None,
+        )
 
     return ui
 
@@ -0,0 +1,665 @@
+"""
+Micro-benchmarks for the trading floor's storage and market layers.
+
+Each benchmark runs against a throwaway database so accounts.db is never touched:
+
+    uv run benchmarks.py db-writes --processes 4 --writes 2000
+    uv run benchmarks.py log-reads --rows 1000000
+    uv run benchmarks.py account-load --transactions 100000
+    uv run benchmarks.py valuation --holdings 50
+    uv run benchmarks.py eod-cold --tickers 10000
+    uv run benchmarks.py price-history --tickers 2000 --days 1250
+    uv run benchmarks.py mcp-session --repeat 20
+    uv run benchmarks.py mcp-transport --repeat 200
+    uv run benchmarks.py report-size --transactions 500
+    uv run benchmarks.py trader-workers --traders 200 --workers 1 2 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label: str, count: int, elapsed: float, latencies: list[float]) -> None:
+    print(
+        f"{label:<28} {count / elapsed:>10,.0f} ops/s   "
+        f"p50 {statistics.median(latencies) * 1000:>7.3f} ms   "
+        f"p99 {percentile(latencies, 99) * 1000:>7.3f} ms"
+    )
+
+
+# db-writes: concurrent write_log throughput, fresh connection per call vs pooled WAL connection
+
+
+def _legacy_writer(path: str, writes: int, queue) -> None:
+    latencies = []
+    for i in range(writes):
+        start = time.perf_counter()
+        with sqlite3.connect(path, timeout=30) as conn:
+            conn.execute(
+                "INSERT INTO logs (name, datetime, type, message) VALUES (?, datetime('now'), ?, ?)",
+                ("bench", "account", f"message {i}"),
+            )
+            conn.commit()
+        conn.close()
+        latencies.append(time.perf_counter() - start)
+    queue.put(latencies)
+
+
+def _pooled_writer(path: str, writes: int, queue) -> None:
+    os.environ["ACCOUNTS_DB"] = path
+    import database
+
+    latencies = []
+    for i in range(writes):
+        start = time.perf_counter()
+        database.write_logs([("bench", "2025-01-01 00:00:00", "account", f"message {i}")])
+        latencies.append(time.perf_counter() - start)
+    queue.put(latencies)
+
+
+def _batched_writer(path: str, writes: int, queue) -> None:
+    os.environ["ACCOUNTS_DB"] = path
+    import database
+
+    latencies = []
+    for i in range(writes):
+        start = time.perf_counter()
+        database.write_log("bench", "account", f"message {i}")
+        latencies.append(time.perf_counter() - start)
+    database.log_writer.shutdown()
+    queue.put(latencies)
+
+
+def _run_writers(target, path: str, processes: int, writes: int) -> tuple[float, list[float]]:
+    queue = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target=target, args=(path, writes, queue)) for _ in range(processes)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    latencies = []
+    for _ in workers:
+        latencies.extend(queue.get())
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start, latencies
+
+
+def bench_db_writes(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        with sqlite3.connect(legacy_path) as conn:
+            conn.execute(
+                "CREATE TABLE logs (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, "
+                "datetime DATETIME, type TEXT, message TEXT)"
+            )
+        conn.close()
+
+        total = args.processes * args.writes
+        print(f"{args.processes} writer processes x {args.writes} writes")
+        elapsed, latencies = _run_writers(_legacy_writer, legacy_path, args.processes, args.writes)
+        report("before (connect per call)", total, elapsed, latencies)
+        elapsed, latencies = _run_writers(
+            _pooled_writer, os.path.join(tmp, "pooled.db"), args.processes, args.writes
+        )
+        report("after (pooled WAL)", total, elapsed, latencies)
+        elapsed, latencies = _run_writers(
+            _batched_writer, os.path.join(tmp, "batched.db"), args.processes, args.writes
+        )
+        report("after (batched log writer)", total, elapsed, latencies)
+
+
+# log-reads: dashboard log polling over a large logs table, before and after the indexes
+
+
+TRADERS = ["warren", "george", "ray", "cathie"]
+
+
+def _time_calls(fn, repeat: int) -> tuple[float, list[float]]:
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call_start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - call_start)
+    return time.perf_counter() - start, latencies
+
+
+def _timestamp(second: int) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(1_700_000_000 + second))
+
+
+def bench_log_reads(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["ACCOUNTS_DB"] = os.path.join(tmp, "logs.db")
+        import database
+
+        print(f"Loading {args.rows:,} log rows")
+        rows = (
+            (TRADERS[i % len(TRADERS)], _timestamp(i), "span", f"message {i}")
+            for i in range(args.rows)
+        )
+        database.write_logs(rows)
+        conn = database.get_connection()
+        last_id = conn.execute("SELECT MAX(id) FROM logs WHERE name = ?", ("warren",)).fetchone()[0]
+
+        conn.execute("DROP INDEX idx_logs_name_datetime")
+        conn.execute("DROP INDEX idx_logs_name_id")
+        def legacy_read_log():
+            return list(
+                conn.execute(
+                    "SELECT datetime, type, message FROM logs WHERE name = ? ORDER BY datetime DESC LIMIT ?",
+                    ("warren", 13),
+                )
+            )
+
+        elapsed, latencies = _time_calls(legacy_read_log, args.polls)
+        report("before: read_log, no index", args.polls, elapsed, latencies)
+
+        conn.execute("PRAGMA user_version = 0")
+        database.migrate()
+        elapsed, latencies = _time_calls(lambda: list(database.read_log("warren", 13)), args.polls)
+        report("after: read_log, indexed", args.polls, elapsed, latencies)
+        elapsed, latencies = _time_calls(
+            lambda: database.read_log_since("warren", last_id - 4, limit=13), args.polls
+        )
+        report("after: read_log_since", args.polls, elapsed, latencies)
+
+
+# account-load: loading an account with a long trading history, JSON blob vs ledger
+
+
+def _trading_history(count: int) -> list[tuple[str, str, dict]]:
+    symbols = ["AAPL", "MSFT", "NVDA", "AMZN", "GOOG", "META", "TSLA", "AMD"]
+    events = []
+    for i in range(count):
+        symbol = symbols[i % len(symbols)]
+        type = "buy" if i % (2 * len(symbols)) < len(symbols) else "sell"
+        data = {"symbol": symbol, "quantity": 10, "price": 100.0 + i % 50, "rationale": "benchmark"}
+        events.append((_timestamp(i * 60), type, data))
+    return events
+
+
+def _parse_account_blob(blob: str):
+    # How accounts used to load: the whole account, history included, from one JSON blob
+    import json
+    from accounts import Account, Transaction
+
+    data = json.loads(blob)
+    return Account(**data), [Transaction(**t) for t in data["transactions"]]
+
+
+def bench_account_load(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["ACCOUNTS_DB"] = os.path.join(tmp, "ledger.db")
+        import json
+        import database
+        import ledger
+        from accounts import Account, INITIAL_BALANCE
+
+        events = _trading_history(args.transactions)
+        state = ledger.empty_state(INITIAL_BALANCE * 1000, "benchmark")
+        transactions = []
+        with database.transaction():
+            for name in ("bench", "nosnapshots"):
+                ledger.write_snapshot(name, 0, "", state)
+            for start in range(0, len(events), ledger.SNAPSHOT_EVERY):
+                chunk = events[start:start + ledger.SNAPSHOT_EVERY]
+                ledger.append_events("nosnapshots", chunk)
+                last_id = ledger.append_events("bench", chunk)
+                for timestamp, type, data in chunk:
+                    ledger.apply_event(state, type, data)
+                    quantity = data["quantity"] if type == "buy" else -data["quantity"]
+                    transactions.append({**data, "quantity": quantity, "timestamp": timestamp})
+                ledger.write_snapshot("bench", last_id, chunk[-1][0], state)
+            database.write_account_delta("bench", state["balance"], "benchmark", state["holdings"], transactions, [])
+
+        blob = json.dumps({
+            "name": "bench", **state, "transactions": transactions, "portfolio_value_time_series": []
+        })
+        print(f"Account with {args.transactions:,} transactions ({len(blob) / 1e6:.1f} MB as JSON)")
+        middle = events[len(events) // 2][0]
+        runs = [
+            ("before: parse JSON blob", lambda: _parse_account_blob(blob)),
+            ("ledger: full replay", lambda: ledger.replay("nosnapshots")),
+            ("ledger: snapshot + tail", lambda: ledger.replay("bench")),
+            ("ledger: replay(until=mid)", lambda: ledger.replay("bench", until=middle)),
+            ("Account.get", lambda: Account.get("bench")),
+        ]
+        for label, fn in runs:
+            elapsed, latencies = _time_calls(fn, args.repeat)
+            report(label, args.repeat, elapsed, latencies)
+
+
+# valuation: pricing a portfolio one symbol at a time vs in one batch, against a stub Polygon
+
+
+class StubPolygonClient:
+    """Answers like polygon's RESTClient after a fixed simulated round-trip per request"""
+
+    SETUP_SECONDS = 0.002
+    REQUEST_SECONDS = 0.005
+
+    def __init__(self, api_key=None):
+        time.sleep(self.SETUP_SECONDS)
+
+    @staticmethod
+    def _snapshot(ticker: str):
+        from types import SimpleNamespace
+
+        close = 100.0 + sum(map(ord, ticker)) % 50
+        return SimpleNamespace(ticker=ticker, min=SimpleNamespace(close=close), prev_day=SimpleNamespace(close=close))
+
+    def get_snapshot_ticker(self, market_type, ticker):
+        time.sleep(self.REQUEST_SECONDS)
+        return self._snapshot(ticker)
+
+    def get_snapshot_all(self, market_type, tickers=None):
+        time.sleep(self.REQUEST_SECONDS)
+        return [self._snapshot(ticker) for ticker in tickers]
+
+
+def bench_valuation(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["ACCOUNTS_DB"] = os.path.join(tmp, "valuation.db")
+        os.environ["MARKET_DATA_DIR"] = tmp
+        import market
+        from quote_cache import QuoteCache
+
+        symbols = [f"SYM{i}" for i in range(args.holdings)]
+        # Measure the requests themselves, not the quote cache in front of them
+        market.quote_cache = QuoteCache(0, shared=False)
+        market.polygon_api_key = "stub"
+        market.RESTClient = StubPolygonClient
+        market.get_polygon_client.cache_clear()
+        market.write_market(time.strftime("%Y-%m-%d"), {f"T{i}": float(i) for i in range(10_000)})
+
+        def legacy_paid():
+            # As before: a fresh client and one snapshot request per holding
+            prices = {}
+            for symbol in symbols:
+                result = StubPolygonClient("stub").get_snapshot_ticker("stocks", symbol)
+                prices[symbol] = result.min.close or result.prev_day.close
+            return prices
+
+        def legacy_eod():
+            return {symbol: market.get_share_price(symbol) for symbol in symbols}
+
+        print(f"Valuing a {args.holdings}-holding portfolio")
+        runs = [
+            ("before: per symbol (paid)", True, legacy_paid),
+            ("after: batched (paid)", True, lambda: market.get_share_prices(symbols)),
+            ("before: per symbol (eod)", False, legacy_eod),
+            ("after: batched (eod)", False, lambda: market.get_share_prices(symbols)),
+        ]
+        for label, paid, fn in runs:
+            market.is_paid_polygon = paid
+            elapsed, latencies = _time_calls(fn, args.repeat)
+            report(label, args.repeat, elapsed, latencies)
+
+
+# eod-cold: a fresh process's first price lookup, JSON market row vs memory-mapped snapshot
+
+
+def bench_eod_cold(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["ACCOUNTS_DB"] = os.path.join(tmp, "eod.db")
+        os.environ["MARKET_DATA_DIR"] = tmp
+        import database
+        import eod_store
+
+        eod_store.MARKET_DATA_DIR = tmp
+        prices = {f"T{i:05d}": float(i) for i in range(args.tickers)}
+        database.write_market("2025-01-02", prices)
+        eod_store.write_snapshot("2025-01-02", prices)
+        size = os.path.getsize(eod_store.snapshot_path("2025-01-02"))
+        print(f"{args.tickers:,} tickers; snapshot file {size / 1e3:.0f} kB")
+
+        def cold_json():
+            return database.read_market("2025-01-02").get("T00042", 0.0)
+
+        def cold_snapshot():
+            snapshot = eod_store.EODSnapshot.open("2025-01-02")
+            price = snapshot.get("T00042")
+            snapshot.close()
+            return price
+
+        snapshot = eod_store.EODSnapshot.open("2025-01-02")
+        runs = [
+            ("before: read_market + lookup", cold_json),
+            ("after: mmap open + lookup", cold_snapshot),
+            ("after: warm lookup", lambda: snapshot.get("T00042")),
+        ]
+        for label, fn in runs:
+            elapsed, latencies = _time_calls(fn, args.repeat)
+            report(label, args.repeat, elapsed, latencies)
+        snapshot.close()
+
+
+# price-history: range queries over years of daily bars for thousands of tickers
+
+
+def bench_price_history(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["ACCOUNTS_DB"] = os.path.join(tmp, "history.db")
+        from datetime import date, timedelta
+        import price_history
+
+        days = [(date(2020, 1, 1) + timedelta(days=i)).isoformat() for i in range(args.days)]
+        bars = (
+            (f"T{t:05d}", day, 10.0, 11.0, 9.0, 10.5, 1000.0)
+            for t in range(args.tickers)
+            for day in days
+        )
+        start = time.perf_counter()
+        count = price_history.write_bars(bars)
+        print(f"Backfilled {count:,} bars in {time.perf_counter() - start:.1f} s")
+        symbol = f"T{args.tickers // 2:05d}"
+        runs = [
+            ("one year range", lambda: price_history.get_price_history(symbol, days[-365], days[-1])),
+            ("one month range", lambda: price_history.get_price_history(symbol, days[-30], days[-1])),
+            ("close on date", lambda: price_history.get_close_on(symbol, days[len(days) // 2])),
+        ]
+        for label, fn in runs:
+            elapsed, latencies = _time_calls(fn, args.repeat)
+            report(label, args.repeat, elapsed, latencies)
+
+
+# mcp-session: reading an account resource with a one-shot stdio session vs a warm pooled one
+
+
+def bench_mcp_session(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        import asyncio
+        import sys
+        import mcp
+        from mcp.client.stdio import stdio_client
+        from accounts_client import SessionPool
+
+        env = {**os.environ, "ACCOUNTS_DB": os.path.join(tmp, "session.db")}
+        params = mcp.StdioServerParameters(command=sys.executable, args=[args.server], env=env)
+        uri = "accounts://accounts_server/bench"
+
+        async def cold():
+            async with stdio_client(params) as streams:
+                async with mcp.ClientSession(*streams) as session:
+                    await session.initialize()
+                    return await session.read_resource(uri)
+
+        async def run():
+            pool = SessionPool(params, size=1)
+            await pool.run(lambda session: session.read_resource(uri))
+            for label, fn in [
+                ("cold: spawn + initialize", cold),
+                ("warm: pooled session", lambda: pool.run(lambda session: session.read_resource(uri))),
+            ]:
+                latencies = []
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    call_start = time.perf_counter()
+                    await fn()
+                    latencies.append(time.perf_counter() - call_start)
+                report(label, args.repeat, time.perf_counter() - start, latencies)
+            await pool.close()
+
+        asyncio.run(run())
+
+
+# mcp-transport: accounts server tool-call latency over stdio, streamable HTTP and in-process
+
+
+def bench_mcp_transport(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["ACCOUNTS_DB"] = os.path.join(tmp, "transport.db")
+        import asyncio
+        import socket
+        import subprocess
+        import sys
+        from agents.mcp import MCPServerStdio, MCPServerStreamableHttp
+        from inprocess_mcp import MCPServerInProcess
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        serve_http = f"import accounts_server as s; s.mcp.settings.port = {port}; s.mcp.run(transport='streamable-http')"
+        http_server = subprocess.Popen([sys.executable, "-c", serve_http], stderr=subprocess.DEVNULL)
+
+        async def run():
+            servers = [
+                ("stdio", MCPServerStdio({"command": sys.executable, "args": ["accounts_server.py"]})),
+                ("streamable HTTP", MCPServerStreamableHttp({"url": f"http://127.0.0.1:{port}/mcp"})),
+                ("in-process", MCPServerInProcess({"module": "accounts_server"})),
+            ]
+            for label, server in servers:
+                for attempt in range(50):
+                    try:
+                        await server.connect()
+                        break
+                    except Exception:
+                        await asyncio.sleep(0.2)
+                await server.call_tool("get_balance", {"name": "bench"})
+                latencies = []
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    call_start = time.perf_counter()
+                    await server.call_tool("get_balance", {"name": "bench"})
+                    latencies.append(time.perf_counter() - call_start)
+                report(label, args.repeat, time.perf_counter() - start, latencies)
+                await server.cleanup()
+
+        try:
+            asyncio.run(run())
+        finally:
+            http_server.terminate()
+            http_server.wait()
+
+
+# report-size: account report payload for a mature account at each level of detail
+
+
+def _count_tokens(text: str) -> tuple[int, str]:
+    # tiktoken is optional and downloads its encoding on first use; fall back to an estimate
+    try:
+        import tiktoken
+
+        return len(tiktoken.get_encoding("o200k_base").encode(text)), ""
+    except Exception:
+        return len(text) // 4, "~"
+
+
+def bench_report_size(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["ACCOUNTS_DB"] = os.path.join(tmp, "report.db")
+        os.environ["MARKET_DATA_DIR"] = os.path.join(tmp, "market_data")
+        from accounts import Account, Transaction
+        from database import log_writer
+        import accounts
+
+        accounts.get_share_prices = lambda symbols: {symbol: 100.0 for symbol in symbols}
+        account = Account.get("bench")
+        for i in range(args.transactions):
+            quantity = 1 if i % 3 else -1
+            symbol = TRADERS[i % len(TRADERS)].upper()
+            if quantity < 0 and not account.holdings.get(symbol):
+                quantity = 1
+            account.record_transaction(Transaction(symbol=symbol, quantity=quantity, price=100.0, timestamp=_timestamp(i), rationale="Rebalancing toward the strategy's target weights after reviewing recent news"))
+            account._apply("buy" if quantity > 0 else "sell", symbol=symbol, quantity=abs(quantity), price=100.0)
+            account.record_value(_timestamp(i), 10_000.0)
+        account.save()
+        for detail in ("full", "recent", "summary"):
+            payload = account.report(detail)
+            tokens, approximate = _count_tokens(payload)
+            print(f"{detail:<10} {len(payload.encode()):>10,} bytes   {approximate}{tokens:>9,} tokens")
+        log_writer.shutdown()
+
+
+# trader-workers: runs per minute through the worker pool's job queue, by worker count, with a stub model
+
+
+def _stub_model(latency: float, cpu: float):
+    import asyncio
+    from agents.items import ModelResponse
+    from agents.models.interface import Model
+    from agents.usage import Usage
+    from openai.types.responses import Response, ResponseCompletedEvent, ResponseOutputMessage, ResponseOutputText
+
+    class StubModel(Model):
+        # Burns cpu seconds, standing in for prompt building, parsing and tool handling, then
+        # waits latency seconds for the "model" and answers at once without calling a tool
+        async def _answer(self) -> ResponseOutputMessage:
+            busy_until = time.process_time() + cpu
+            while time.process_time() < busy_until:
+                pass
+            await asyncio.sleep(latency)
+            text = ResponseOutputText(type="output_text", text="No trades this time.", annotations=[])
+            return ResponseOutputMessage(id="stub", type="message", role="assistant", status="completed", content=[text])
+
+        async def get_response(self, *args, **kwargs):
+            return ModelResponse(output=[await self._answer()], usage=Usage(), response_id=None)
+
+        async def stream_response(self, *args, **kwargs):
+            response = Response(
+                id="stub",
+                created_at=time.time(),
+                model="stub",
+                object="response",
+                output=[await self._answer()],
+                parallel_tool_calls=False,
+                tool_choice="auto",
+                tools=[],
+            )
+            yield ResponseCompletedEvent(type="response.completed", response=response, sequence_number=0)
+
+    return StubModel()
+
+
+def _stub_worker(path: str, worker: int, workers: int, concurrency: int, latency: float, cpu: float, queue) -> None:
+    os.environ["ACCOUNTS_DB"] = path
+    import asyncio
+    from agents import Agent, Runner, set_tracing_disabled
+    from templates import trader_instructions
+    from worker_pool import work
+
+    set_tracing_disabled(True)
+    model = _stub_model(latency, cpu)
+
+    async def run(trader):
+        agent = Agent(name=trader.name, instructions=trader_instructions(trader.name), model=model)
+        await Runner.run(agent, "Look for trading opportunities.")
+
+    start = time.time()
+    asyncio.run(work(worker, workers, 3600, concurrency, 600, run=run, until_idle=True))
+    queue.put((start, time.time()))
+
+
+def bench_trader_workers(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "workers.db")
+        os.environ["ACCOUNTS_DB"] = path
+        # The stub never calls OpenAI, but traders.py builds its clients on import
+        os.environ.setdefault("OPENAI_API_KEY", "bench")
+        from database import enqueue_trader_jobs, read_trader_runs, write_traders, log_writer
+        from worker_pool import shard
+
+        names = [f"trader{i}" for i in range(args.traders)]
+        write_traders([{"name": name, "lastname": "Bench", "model_name": "stub", "short_model_name": "Stub"} for name in names])
+        context = multiprocessing.get_context("spawn")
+        print(f"{args.traders} traders, {args.concurrency} concurrent runs per worker, "
+              f"stub model {args.latency_ms:.0f} ms wait + {args.cpu_ms:.0f} ms CPU per run")
+        for workers in args.workers:
+            enqueue_trader_jobs([(name, True, time.time(), shard(name, workers)) for name in names])
+            queue = context.Queue()
+            processes = [
+                context.Process(
+                    target=_stub_worker,
+                    args=(path, worker, workers, args.concurrency, args.latency_ms / 1000, args.cpu_ms / 1000, queue),
+                )
+                for worker in range(workers)
+            ]
+            for process in processes:
+                process.start()
+            spans = [queue.get() for _ in processes]
+            for process in processes:
+                process.join()
+            # From the first worker being ready to the last one draining its share
+            elapsed = max(end for _, end in spans) - min(start for start, _ in spans)
+            statuses = [run["status"] for name in names for run in read_trader_runs(name, 1)]
+            print(f"{workers:>2} workers   {args.traders / elapsed * 60:>8,.0f} runs/min   "
+                  f"{elapsed:>6.2f} s   {statuses.count('ok')}/{args.traders} ok")
+        log_writer.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    db_writes = commands.add_parser("db-writes", help="concurrent write_log throughput and latency")
+    db_writes.add_argument("--processes", type=int, default=4)
+    db_writes.add_argument("--writes", type=int, default=2000)
+    db_writes.set_defaults(func=bench_db_writes)
+
+    log_reads = commands.add_parser("log-reads", help="dashboard log polling over a large logs table")
+    log_reads.add_argument("--rows", type=int, default=1_000_000)
+    log_reads.add_argument("--polls", type=int, default=200)
+    log_reads.set_defaults(func=bench_log_reads)
+
+    account_load = commands.add_parser("account-load", help="loading an account with a long history")
+    account_load.add_argument("--transactions", type=int, default=100_000)
+    account_load.add_argument("--repeat", type=int, default=10)
+    account_load.set_defaults(func=bench_account_load)
+
+    valuation = commands.add_parser("valuation", help="pricing a portfolio against a stub Polygon")
+    valuation.add_argument("--holdings", type=int, default=50)
+    valuation.add_argument("--repeat", type=int, default=20)
+    valuation.set_defaults(func=bench_valuation)
+
+    eod_cold = commands.add_parser("eod-cold", help="a fresh process's first EOD price lookup")
+    eod_cold.add_argument("--tickers", type=int, default=10_000)
+    eod_cold.add_argument("--repeat", type=int, default=200)
+    eod_cold.set_defaults(func=bench_eod_cold)
+
+    history = commands.add_parser("price-history", help="range queries over the daily price history")
+    history.add_argument("--tickers", type=int, default=2000)
+    history.add_argument("--days", type=int, default=1250)
+    history.add_argument("--repeat", type=int, default=200)
+    history.set_defaults(func=bench_price_history)
+
+    session = commands.add_parser("mcp-session", help="cold vs warm accounts server resource reads")
+    session.add_argument("--server", default="accounts_server.py")
+    session.add_argument("--repeat", type=int, default=20)
+    session.set_defaults(func=bench_mcp_session)
+
+    transport = commands.add_parser("mcp-transport", help="tool-call latency for stdio, HTTP and in-process servers")
+    transport.add_argument("--repeat", type=int, default=200)
+    transport.set_defaults(func=bench_mcp_transport)
+
+    report_size = commands.add_parser("report-size", help="account report bytes and tokens by level of detail")
+    report_size.add_argument("--transactions", type=int, default=500)
+    report_size.set_defaults(func=bench_report_size)
+
+    trader_workers = commands.add_parser("trader-workers", help="trader runs per minute by worker count, with a stub model")
+    trader_workers.add_argument("--traders", type=int, default=200)
+    trader_workers.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    trader_workers.add_argument("--concurrency", type=int, default=8)
+    trader_workers.add_argument("--latency-ms", type=float, default=200)
+    trader_workers.add_argument("--cpu-ms", type=float, default=20)
+    trader_workers.set_defaults(func=bench_trader_workers)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
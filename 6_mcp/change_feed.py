@@ -0,0 +1,100 @@
+import asyncio
+import os
+import threading
+from dotenv import load_dotenv
+from database import get_connection, data_version
+
+load_dotenv(override=True)
+
+# One poller per dashboard process watches the traders' newest log ids and account versions
+# and wakes every subscribed page when one moves. Pages wait on the feed instead of polling
+# the database, so the queries per second stay the same however many viewers are open, and
+# a quiet database costs a single PRAGMA data_version per interval.
+
+FEED_INTERVAL_SECONDS = float(os.getenv("DASHBOARD_FEED_INTERVAL_SECONDS", "0.5"))
+
+
+class ChangeFeed:
+    def __init__(self, names: list[str], interval: float = FEED_INTERVAL_SECONDS):
+        self.names = [name.lower() for name in names]
+        self.interval = interval
+        self.log_ids = {name: 0 for name in self.names}
+        self.account_versions = {name: 0 for name in self.names}
+        self.sequence = 0
+        self._data_version = None
+        self._waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def poll(self) -> bool:
+        """Read the latest ids and versions and wake subscribers; returns whether anything changed."""
+        if not self._read_changes():
+            return False
+        self._notify()
+        return True
+
+    def _read_changes(self) -> bool:
+        current = data_version()
+        if current == self._data_version:
+            return False
+        self._data_version = current
+        conn = get_connection()
+        log_ids = {
+            name: conn.execute("SELECT MAX(id) FROM logs WHERE name = ?", (name,)).fetchone()[0] or 0
+            for name in self.names
+        }
+        placeholders = ",".join("?" * len(self.names))
+        versions = dict(conn.execute(f"SELECT name, version FROM accounts WHERE name IN ({placeholders})", self.names))
+        versions = {name: versions.get(name, 0) for name in self.names}
+        with self._lock:
+            if log_ids == self.log_ids and versions == self.account_versions:
+                return False
+            self.log_ids, self.account_versions = log_ids, versions
+        return True
+
+    def _notify(self) -> None:
+        with self._lock:
+            self.sequence += 1
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Change feed failed to poll: {e}")
+
+    def start(self) -> "ChangeFeed":
+        if self._thread is None:
+            self.poll()
+            self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def snapshot(self) -> tuple[int, dict[str, int], dict[str, int]]:
+        with self._lock:
+            return self.sequence, dict(self.log_ids), dict(self.account_versions)
+
+    async def subscribe(self, timeout: float | None = None):
+        """Yield a snapshot after every change, or after timeout seconds without one."""
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._lock:
+            self._waiters.add(waiter)
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                event.clear()
+                yield self.snapshot()
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
@@ -1,17 +1,121 @@
 import sqlite3
 import json
-from datetime import datetime
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from dotenv import load_dotenv
+from log_writer import create_log_writer
 
 load_dotenv(override=True)
 
-DB = "accounts.db"
+DB = os.getenv("ACCOUNTS_DB", "accounts.db")
 
+# Connection tuning: WAL lets the dashboard read while traders write, NORMAL sync
+# only fsyncs at checkpoints, and busy_timeout makes writers wait instead of failing
 
-with sqlite3.connect(DB) as conn:
-    cursor = conn.cursor()
-    cursor.execute('CREATE TABLE IF NOT EXISTS accounts (name TEXT PRIMARY KEY, account TEXT)')
-    cursor.execute('''
+BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "10000"))
+SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")
+STATEMENT_CACHE_SIZE = 256
+
+_local = threading.local()
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        DB,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        isolation_level=None,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
+    # auto_vacuum only takes effect on a brand new file; retention.reclaim_space converts older ones
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={SYNCHRONOUS}")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Return the pooled connection for the current thread, opening it on first use.
+    Connections are keyed by process too, so a forked child never reuses its parent's handle.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid():
+        conn = _connect()
+        _local.conn = conn
+        _local.pid = os.getpid()
+        _local.depth = 0
+    return conn
+
+
+def close_connection() -> None:
+    """Close the current thread's pooled connection, if any."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.pid == os.getpid():
+        conn.close()
+    _local.conn = None
+
+
+@contextmanager
+def transaction():
+    """
+    Run the enclosed statements in a single write transaction on the pooled connection.
+    BEGIN IMMEDIATE takes the write lock up front so concurrent writers queue on
+    busy_timeout rather than failing on lock upgrade. Nested use joins the outer transaction.
+    """
+    conn = get_connection()
+    if _local.depth:
+        _local.depth += 1
+        try:
+            yield conn
+        finally:
+            _local.depth -= 1
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    _local.depth = 1
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    else:
+        conn.execute("COMMIT")
+    finally:
+        _local.depth = 0
+
+
+@contextmanager
+def read_transaction():
+    """
+    Run the enclosed reads against one consistent view of the database. A deferred
+    transaction holds a single WAL read mark and takes no lock, so writers carry on.
+    Nested use, of either kind, joins the outer transaction.
+    """
+    conn = get_connection()
+    if _local.depth:
+        _local.depth += 1
+        try:
+            yield conn
+        finally:
+            _local.depth -= 1
+        return
+    conn.execute("BEGIN")
+    _local.depth = 1
+    try:
+        yield conn
+    finally:
+        _local.depth = 0
+        conn.execute("COMMIT")
+
+
+with transaction() as conn:
+    conn.execute('CREATE TABLE IF NOT EXISTS accounts (name TEXT PRIMARY KEY, account TEXT)')
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS logs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT,
@@ -20,82 +124,650 @@ with sqlite3.connect(DB) as conn:
             message TEXT
         )
     ''')
-    cursor.execute('CREATE TABLE IF NOT EXISTS market (date TEXT PRIMARY KEY, data TEXT)')
-    conn.commit()
+    conn.execute('CREATE TABLE IF NOT EXISTS market (date TEXT PRIMARY KEY, data TEXT)')
+
+def _normalize_accounts(conn):
+    conn.execute('ALTER TABLE accounts RENAME TO accounts_blob')
+    conn.execute('CREATE TABLE accounts (name TEXT PRIMARY KEY, balance REAL, strategy TEXT)')
+    conn.execute('''
+        CREATE TABLE holdings (
+            name TEXT,
+            symbol TEXT,
+            quantity INTEGER,
+            PRIMARY KEY (name, symbol)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            symbol TEXT,
+            quantity INTEGER,
+            price REAL,
+            timestamp TEXT,
+            rationale TEXT
+        )
+    ''')
+    conn.execute('CREATE INDEX idx_transactions_name_id ON transactions (name, id)')
+    conn.execute('''
+        CREATE TABLE portfolio_values (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            datetime TEXT,
+            value REAL
+        )
+    ''')
+    conn.execute('CREATE INDEX idx_portfolio_values_name_id ON portfolio_values (name, id)')
+    # Rollups come later, in migration 9, which builds them from portfolio_values
+    for name, blob in conn.execute('SELECT name, account FROM accounts_blob').fetchall():
+        _insert_account(conn, name, json.loads(blob), rollups=False)
+    conn.execute('DROP TABLE accounts_blob')
+
+def _create_portfolio_rollups(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS portfolio_rollups (
+            name TEXT,
+            resolution INTEGER,
+            bucket TEXT,
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL,
+            count INTEGER,
+            last_at TEXT,
+            PRIMARY KEY (name, resolution, bucket)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_portfolio_values_name_datetime ON portfolio_values (name, datetime)')
+    rows = conn.execute('SELECT name, datetime, value FROM portfolio_values ORDER BY id').fetchall()
+    for name in {row[0] for row in rows}:
+        _append_rollups(conn, name, [(when, value) for row_name, when, value in rows if row_name == name])
+
+def _create_ledger(conn):
+    conn.execute('''
+        CREATE TABLE account_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            timestamp TEXT,
+            type TEXT,
+            data TEXT
+        )
+    ''')
+    conn.execute('CREATE INDEX idx_account_events_name_id ON account_events (name, id)')
+    conn.execute('''
+        CREATE TABLE account_snapshots (
+            name TEXT,
+            event_id INTEGER,
+            timestamp TEXT,
+            state TEXT,
+            PRIMARY KEY (name, event_id)
+        ) WITHOUT ROWID
+    ''')
+    # Existing accounts start their ledger from a snapshot of their current state
+    for name, balance, strategy in conn.execute('SELECT name, balance, strategy FROM accounts').fetchall():
+        holdings = dict(conn.execute('SELECT symbol, quantity FROM holdings WHERE name = ?', (name,)).fetchall())
+        state = {"balance": balance, "strategy": strategy, "holdings": holdings}
+        conn.execute(
+            'INSERT INTO account_snapshots (name, event_id, timestamp, state) VALUES (?, 0, ?, ?)',
+            (name, "", json.dumps(state)),
+        )
+
+def _snapshot_aggregates(conn):
+    # Re-snapshot every account at the head of its ledger with the running P&L aggregates,
+    # recomputed once from its transactions
+    for name, balance, strategy in conn.execute('SELECT name, balance, strategy FROM accounts').fetchall():
+        holdings = dict(conn.execute('SELECT symbol, quantity FROM holdings WHERE name = ?', (name,)).fetchall())
+        held, cost_basis, net_invested, realized_pnl = {}, {}, 0.0, 0.0
+        trades = conn.execute('SELECT symbol, quantity, price FROM transactions WHERE name = ? ORDER BY id', (name,))
+        for symbol, quantity, price in trades.fetchall():
+            if quantity > 0:
+                before = held.get(symbol, 0)
+                cost_basis[symbol] = (before * cost_basis.get(symbol, 0.0) + quantity * price) / (before + quantity)
+            else:
+                realized_pnl += -quantity * (price - cost_basis.get(symbol, 0.0))
+            net_invested += quantity * price
+            held[symbol] = held.get(symbol, 0) + quantity
+            if not held[symbol]:
+                del held[symbol]
+                cost_basis.pop(symbol, None)
+        state = {
+            "balance": balance,
+            "strategy": strategy,
+            "holdings": holdings,
+            "cost_basis": cost_basis,
+            "net_invested": net_invested,
+            "realized_pnl": realized_pnl,
+        }
+        head = conn.execute(
+            'SELECT id, timestamp FROM account_events WHERE name = ? ORDER BY id DESC LIMIT 1', (name,)
+        ).fetchone()
+        event_id, timestamp = head or (0, "")
+        conn.execute('''
+            INSERT INTO account_snapshots (name, event_id, timestamp, state)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(name, event_id) DO UPDATE SET state=excluded.state
+        ''', (name, event_id, timestamp, json.dumps(state)))
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version.
+# Each step is either a SQL statement or a callable taking the connection.
+
+MIGRATIONS = [
+    # 1: per-trader log polling reads by (name, datetime) and by (name, id) cursor
+    [
+        'CREATE INDEX IF NOT EXISTS idx_logs_name_datetime ON logs (name, datetime)',
+        'CREATE INDEX IF NOT EXISTS idx_logs_name_id ON logs (name, id)',
+    ],
+    # 2: per-hour counts by type for logs compacted by retention.py
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS log_rollups (
+            name TEXT,
+            hour TEXT,
+            type TEXT,
+            count INTEGER,
+            PRIMARY KEY (name, hour, type)
+        ) WITHOUT ROWID
+        ''',
+    ],
+    # 3: normalized account storage replacing the one-JSON-blob-per-account table
+    [_normalize_accounts],
+    # 4: append-only account ledger with periodic snapshots, see ledger.py
+    [_create_ledger],
+    # 5: running cost basis and P&L aggregates in ledger snapshots
+    [_snapshot_aggregates],
+    # 6: quotes shared between processes by quote_cache.py
+    ['CREATE TABLE IF NOT EXISTS quotes (symbol TEXT PRIMARY KEY, price REAL, fetched_at REAL) WITHOUT ROWID'],
+    # 7: daily OHLCV history clustered by (symbol, date), see price_history.py
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS price_history (
+            symbol TEXT,
+            date TEXT,
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL,
+            volume REAL,
+            PRIMARY KEY (symbol, date)
+        ) WITHOUT ROWID
+        ''',
+    ],
+    # 8: per-account version, bumped on every write, for caches in other processes
+    ['ALTER TABLE accounts ADD COLUMN version INTEGER NOT NULL DEFAULT 0'],
+    # 9: 5-minute, hourly and daily rollups of portfolio values, see timeseries.py
+    [_create_portfolio_rollups],
+    # 10: keyset pages of transactions filtered by symbol or bounded by date
+    [
+        'CREATE INDEX IF NOT EXISTS idx_transactions_name_symbol_id ON transactions (name, symbol, id)',
+        'CREATE INDEX IF NOT EXISTS idx_transactions_name_timestamp ON transactions (name, timestamp)',
+    ],
+    # 11: one row per scheduled trader run, see scheduler.py
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS trader_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            scheduled_at TEXT,
+            queued_seconds REAL,
+            run_seconds REAL,
+            status TEXT,
+            error TEXT
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_trader_runs_name_id ON trader_runs (name, id)',
+    ],
+    # 12: traders defined in the database, and the queue of runs for worker processes, see worker_pool.py
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS traders (
+            name TEXT PRIMARY KEY,
+            lastname TEXT,
+            model_name TEXT,
+            short_model_name TEXT,
+            enabled INTEGER NOT NULL DEFAULT 1
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS trader_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            trade INTEGER,
+            scheduled_at REAL,
+            worker INTEGER,
+            status TEXT,
+            claimed_at REAL
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_trader_jobs_worker_status_id ON trader_jobs (worker, status, id)',
+        'CREATE INDEX IF NOT EXISTS idx_trader_jobs_name_status ON trader_jobs (name, status)',
+    ],
+    # 13: symbols are stored as the agent typed them, so the symbol filter matches any case
+    [
+        'DROP INDEX IF EXISTS idx_transactions_name_symbol_id',
+        'CREATE INDEX IF NOT EXISTS idx_transactions_name_symbol_nocase_id ON transactions (name, symbol COLLATE NOCASE, id)',
+    ],
+]
+
+def migrate():
+    with transaction() as conn:
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        for number, steps in enumerate(MIGRATIONS[version:], start=version + 1):
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f'PRAGMA user_version = {number}')
+
+def _insert_account(conn, name, account_dict, rollups=True):
+    conn.execute('''
+        INSERT INTO accounts (name, balance, strategy)
+        VALUES (?, ?, ?)
+        ON CONFLICT(name) DO UPDATE SET balance=excluded.balance, strategy=excluded.strategy
+    ''', (name, account_dict["balance"], account_dict["strategy"]))
+    _write_holdings(conn, name, account_dict["holdings"])
+    _append_transactions(conn, name, account_dict["transactions"])
+    _append_portfolio_values(conn, name, account_dict["portfolio_value_time_series"], rollups)
+
+def _write_holdings(conn, name, holdings):
+    conn.executemany('''
+        INSERT INTO holdings (name, symbol, quantity)
+        VALUES (?, ?, ?)
+        ON CONFLICT(name, symbol) DO UPDATE SET quantity=excluded.quantity
+    ''', [(name, symbol, quantity) for symbol, quantity in holdings.items() if quantity])
+    conn.executemany(
+        'DELETE FROM holdings WHERE name = ? AND symbol = ?',
+        [(name, symbol) for symbol, quantity in holdings.items() if not quantity],
+    )
+
+def _append_transactions(conn, name, transactions):
+    conn.executemany('''
+        INSERT INTO transactions (name, symbol, quantity, price, timestamp, rationale)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', [
+        (name, t["symbol"], t["quantity"], t["price"], t["timestamp"], t["rationale"])
+        for t in transactions
+    ])
+
+def _append_portfolio_values(conn, name, values, rollups=True):
+    conn.executemany(
+        'INSERT INTO portfolio_values (name, datetime, value) VALUES (?, ?, ?)',
+        [(name, when, value) for when, value in values],
+    )
+    if rollups:
+        _append_rollups(conn, name, values)
+
+# Bucket widths in seconds for the portfolio value rollups, finest first
+ROLLUP_RESOLUTIONS = (300, 3600, 86400)
+
+def _append_rollups(conn, name, values):
+    """Fold (datetime, value) points into the open/high/low/close bucket at every resolution."""
+    conn.executemany('''
+        INSERT INTO portfolio_rollups (name, resolution, bucket, open, high, low, close, count, last_at)
+        VALUES (?1, ?2, datetime(CAST(strftime('%s', ?3) AS INTEGER) / ?2 * ?2, 'unixepoch'), ?4, ?4, ?4, ?4, 1, ?3)
+        ON CONFLICT(name, resolution, bucket) DO UPDATE SET
+            high = max(high, excluded.high),
+            low = min(low, excluded.low),
+            close = CASE WHEN excluded.last_at >= last_at THEN excluded.close ELSE close END,
+            last_at = max(last_at, excluded.last_at),
+            count = count + 1
+    ''', [(name, resolution, when, value) for resolution in ROLLUP_RESOLUTIONS for when, value in values])
+
+def _delete_account(conn, name):
+    for table in ("accounts", "holdings", "transactions", "portfolio_values", "portfolio_rollups"):
+        conn.execute(f'DELETE FROM {table} WHERE name = ?', (name,))
+
+def _bump_version(conn, name, version):
+    conn.execute('UPDATE accounts SET version = ? WHERE name = ?', (version + 1, name))
+    return version + 1
 
 def write_account(name, account_dict):
-    json_data = json.dumps(account_dict)
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO accounts (name, account)
-            VALUES (?, ?)
-            ON CONFLICT(name) DO UPDATE SET account=excluded.account
-        ''', (name.lower(), json_data))
-        conn.commit()
+    """Replace everything stored for an account with the given full account dict; returns its new version."""
+    name = name.lower()
+    with transaction() as conn:
+        version = read_account_version(name) or 0
+        _delete_account(conn, name)
+        _insert_account(conn, name, account_dict)
+        return _bump_version(conn, name, version)
+
+def write_account_delta(name, balance, strategy, holdings, transactions, portfolio_values):
+    """
+    Persist only what changed since the account was last read or written.
+
+    Args:
+        name (str): The account name
+        balance (float): The new cash balance
+        strategy (str): The current strategy
+        holdings (dict): Changed symbols mapped to their new quantity, 0 to remove
+        transactions (list): New transaction dicts to append
+        portfolio_values (list): New (datetime, value) points to append
+
+    Returns:
+        int: The account's new version
+    """
+    name = name.lower()
+    with transaction() as conn:
+        version = read_account_version(name) or 0
+        conn.execute('''
+            INSERT INTO accounts (name, balance, strategy)
+            VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET balance=excluded.balance, strategy=excluded.strategy
+        ''', (name, balance, strategy))
+        _write_holdings(conn, name, holdings)
+        _append_transactions(conn, name, transactions)
+        _append_portfolio_values(conn, name, portfolio_values)
+        return _bump_version(conn, name, version)
+
+def read_account_version(name):
+    """The account's version, incremented by every write, or None if it has never been written."""
+    row = get_connection().execute('SELECT version FROM accounts WHERE name = ?', (name.lower(),)).fetchone()
+    return row[0] if row else None
+
+def data_version():
+    """Changes whenever another connection commits to the database; see PRAGMA data_version."""
+    return get_connection().execute('PRAGMA data_version').fetchone()[0]
+
+def read_transactions(name):
+    cursor = get_connection().execute('''
+        SELECT symbol, quantity, price, timestamp, rationale FROM transactions
+        WHERE name = ?
+        ORDER BY id
+    ''', (name.lower(),))
+    return [
+        {"symbol": symbol, "quantity": quantity, "price": price, "timestamp": timestamp, "rationale": rationale}
+        for symbol, quantity, price, timestamp, rationale in cursor
+    ]
+
+def read_transaction_count(name):
+    """How many transactions an account has, counted on the (name, id) index."""
+    row = get_connection().execute('SELECT COUNT(*) FROM transactions WHERE name = ?', (name.lower(),)).fetchone()
+    return row[0]
+
+def read_transactions_page(
+    name: str,
+    cursor: int | None = None,
+    limit: int = 10,
+    newest_first: bool = True,
+    symbol: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
+):
+    """
+    Read one page of an account's transactions, paginated by id so that every page costs
+    a few index seeks however long the history.
+
+    Args:
+        name (str): The account to read
+        cursor (int): The id of the last transaction on the previous page, or None for the first
+        limit (int): The page size
+        newest_first (bool): Page from the newest transaction back, or from the oldest forward
+        symbol (str): Only transactions in this symbol
+        start (str): Only transactions at or after this date or timestamp
+        end (str): Only transactions on or before this date or timestamp
+
+    Returns:
+        list: Transaction dicts including their id, in page order
+    """
+    name = name.lower()
+    conn = get_connection()
+    conditions, params = ["name = ?"], [name]
+    # Transactions are appended as they happen, so a date range is an id range: find its
+    # ends with one seek each on (name, timestamp) and page through ids as usual
+    if start:
+        low = conn.execute(
+            'SELECT id FROM transactions WHERE name = ? AND timestamp >= ? ORDER BY timestamp, id LIMIT 1', (name, start)
+        ).fetchone()
+        if not low:
+            return []
+        conditions.append("id >= ?")
+        params.append(low[0])
+    if end:
+        # "~" sorts after any time, so a bare date includes the whole day
+        high = conn.execute(
+            'SELECT id FROM transactions WHERE name = ? AND timestamp <= ? ORDER BY timestamp DESC, id DESC LIMIT 1',
+            (name, end + "~"),
+        ).fetchone()
+        if not high:
+            return []
+        conditions.append("id <= ?")
+        params.append(high[0])
+    if symbol:
+        conditions.append("symbol = ? COLLATE NOCASE")
+        params.append(symbol)
+    if cursor is not None:
+        conditions.append("id < ?" if newest_first else "id > ?")
+        params.append(cursor)
+    rows = conn.execute(f'''
+        SELECT id, symbol, quantity, price, timestamp, rationale FROM transactions
+        WHERE {" AND ".join(conditions)}
+        ORDER BY id {"DESC" if newest_first else "ASC"}
+        LIMIT ?
+    ''', (*params, limit))
+    return [
+        {"id": id, "symbol": symbol, "quantity": quantity, "price": price, "timestamp": timestamp, "rationale": rationale}
+        for id, symbol, quantity, price, timestamp, rationale in rows
+    ]
+
+def read_portfolio_values(name):
+    cursor = get_connection().execute(
+        'SELECT datetime, value FROM portfolio_values WHERE name = ? ORDER BY id', (name.lower(),)
+    )
+    return cursor.fetchall()
 
 def read_account(name):
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('SELECT account FROM accounts WHERE name = ?', (name.lower(),))
-        row = cursor.fetchone()
-        return json.loads(row[0]) if row else None
-    
+    name = name.lower()
+    conn = get_connection()
+    row = conn.execute('SELECT balance, strategy FROM accounts WHERE name = ?', (name,)).fetchone()
+    if not row:
+        return None
+    holdings = conn.execute('SELECT symbol, quantity FROM holdings WHERE name = ?', (name,))
+    return {
+        "name": name,
+        "balance": row[0],
+        "strategy": row[1],
+        "holdings": dict(holdings.fetchall()),
+        "transactions": read_transactions(name),
+        "portfolio_value_time_series": read_portfolio_values(name),
+    }
+
+def write_logs(entries):
+    """
+    Persist a batch of log entries in one transaction.
+
+    Args:
+        entries (list): Tuples of (name, datetime, type, message)
+    """
+    with transaction() as conn:
+        conn.executemany('''
+            INSERT INTO logs (name, datetime, type, message)
+            VALUES (?, ?, ?, ?)
+        ''', entries)
+
+log_writer = create_log_writer(write_logs)
+
 def write_log(name: str, type: str, message: str):
     """
     Write a log entry to the logs table.
-    
+    The entry is timestamped now and persisted by the background log writer.
+
     Args:
         name (str): The name associated with the log
         type (str): The type of log entry
         message (str): The log message
     """
-    now = datetime.now().isoformat()
-    
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO logs (name, datetime, type, message)
-            VALUES (?, datetime('now'), ?, ?)
-        ''', (name.lower(), type, message))
-        conn.commit()
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    log_writer.write((name.lower(), now, type, message))
 
 def read_log(name: str, last_n=10):
     """
     Read the most recent log entries for a given name.
-    
+
     Args:
         name (str): The name to retrieve logs for
         last_n (int): Number of most recent entries to retrieve
-        
+
     Returns:
         list: A list of tuples containing (datetime, type, message)
     """
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT datetime, type, message FROM logs 
-            WHERE name = ? 
-            ORDER BY datetime DESC
-            LIMIT ?
-        ''', (name.lower(), last_n))
-        
-        return reversed(cursor.fetchall())
+    cursor = get_connection().execute('''
+        SELECT datetime, type, message FROM logs
+        WHERE name = ?
+        ORDER BY datetime DESC, id DESC
+        LIMIT ?
+    ''', (name.lower(), last_n))
+
+    return reversed(cursor.fetchall())
+
+def read_log_since(name: str, last_id: int = 0, limit: int | None = None):
+    """
+    Read the log entries for a given name that are newer than a cursor.
+    Polling with the id of the last row seen costs only the rows added since.
+
+    Args:
+        name (str): The name to retrieve logs for
+        last_id (int): The id of the last entry already seen, or 0 for the start
+        limit (int): If given, only the newest `limit` of the new entries are returned
+
+    Returns:
+        list: A list of tuples containing (id, datetime, type, message), oldest first
+    """
+    cursor = get_connection().execute('''
+        SELECT id, datetime, type, message FROM logs
+        WHERE name = ? AND id > ?
+        ORDER BY id DESC
+        LIMIT ?
+    ''', (name.lower(), last_id, -1 if limit is None else limit))
+
+    return list(reversed(cursor.fetchall()))
 
 def write_market(date: str, data: dict) -> None:
     data_json = json.dumps(data)
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
+    with transaction() as conn:
+        conn.execute('''
             INSERT INTO market (date, data)
             VALUES (?, ?)
             ON CONFLICT(date) DO UPDATE SET data=excluded.data
         ''', (date, data_json))
-        conn.commit()
 
 def read_market(date: str) -> dict | None:
-    with sqlite3.connect(DB) as conn:
-        cursor = conn.cursor()
-        cursor.execute('SELECT data FROM market WHERE date = ?', (date,))
-        row = cursor.fetchone()
-        return json.loads(row[0]) if row else None
\ No newline at end of file
+    cursor = get_connection().execute('SELECT data FROM market WHERE date = ?', (date,))
+    row = cursor.fetchone()
+    return json.loads(row[0]) if row else None
+
+def read_quotes(symbols, fresh_after: float) -> dict:
+    """Return {symbol: (price, fetched_at)} for quotes fetched after the given epoch time."""
+    symbols = list(symbols)
+    placeholders = ", ".join("?" * len(symbols))
+    cursor = get_connection().execute(
+        f'SELECT symbol, price, fetched_at FROM quotes WHERE fetched_at > ? AND symbol IN ({placeholders})',
+        (fresh_after, *symbols),
+    )
+    return {symbol: (price, fetched_at) for symbol, price, fetched_at in cursor}
+
+def write_quotes(quotes: dict) -> None:
+    """Store {symbol: (price, fetched_at)} quotes."""
+    with transaction() as conn:
+        conn.executemany('''
+            INSERT INTO quotes (symbol, price, fetched_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(symbol) DO UPDATE SET price=excluded.price, fetched_at=excluded.fetched_at
+        ''', [(symbol, price, fetched_at) for symbol, (price, fetched_at) in quotes.items()])
+
+def write_trader_run(name: str, scheduled_at: str, queued_seconds: float, run_seconds: float, status: str, error: str | None = None) -> None:
+    """Record a scheduled run: how long it waited for a slot, how long it ran, and how it ended."""
+    with transaction() as conn:
+        conn.execute('''
+            INSERT INTO trader_runs (name, scheduled_at, queued_seconds, run_seconds, status, error)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (name.lower(), scheduled_at, queued_seconds, run_seconds, status, error))
+
+def read_trader_runs(name: str, last_n: int = 10) -> list[dict]:
+    """The most recent scheduled runs of a trader, oldest first."""
+    cursor = get_connection().execute('''
+        SELECT scheduled_at, queued_seconds, run_seconds, status, error FROM trader_runs
+        WHERE name = ?
+        ORDER BY id DESC
+        LIMIT ?
+    ''', (name.lower(), last_n))
+    return [
+        {"scheduled_at": scheduled_at, "queued_seconds": queued, "run_seconds": run, "status": status, "error": error}
+        for scheduled_at, queued, run, status, error in reversed(cursor.fetchall())
+    ]
+
+def read_traders(enabled_only: bool = True) -> list[dict]:
+    """The configured traders, in the order they were added."""
+    cursor = get_connection().execute(f'''
+        SELECT name, lastname, model_name, short_model_name, enabled FROM traders
+        {"WHERE enabled" if enabled_only else ""}
+        ORDER BY rowid
+    ''')
+    return [
+        {"name": name, "lastname": lastname, "model_name": model_name, "short_model_name": short_model_name, "enabled": bool(enabled)}
+        for name, lastname, model_name, short_model_name, enabled in cursor
+    ]
+
+def write_traders(traders: list[dict]) -> None:
+    """Add or update traders, given dicts with the keys read_traders returns."""
+    with transaction() as conn:
+        conn.executemany('''
+            INSERT INTO traders (name, lastname, model_name, short_model_name, enabled)
+            VALUES (:name, :lastname, :model_name, :short_model_name, :enabled)
+            ON CONFLICT(name) DO UPDATE SET
+                lastname=excluded.lastname,
+                model_name=excluded.model_name,
+                short_model_name=excluded.short_model_name,
+                enabled=excluded.enabled
+        ''', [{"enabled": True, **trader} for trader in traders])
+
+def enqueue_trader_jobs(jobs: list[tuple[str, bool, float, int]]) -> list[str]:
+    """
+    Queue (name, trade, scheduled_at, worker) runs, skipping any trader that already has a
+    run queued or in progress. Returns the names queued.
+    """
+    queued = []
+    with transaction() as conn:
+        for name, trade, scheduled_at, worker in jobs:
+            inserted = conn.execute('''
+                INSERT INTO trader_jobs (name, trade, scheduled_at, worker, status)
+                SELECT ?, ?, ?, ?, 'queued'
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM trader_jobs WHERE name = ? AND status IN ('queued', 'running')
+                )
+            ''', (name, trade, scheduled_at, worker, name)).rowcount
+            if inserted:
+                queued.append(name)
+    return queued
+
+def claim_trader_jobs(worker: int, limit: int) -> list[dict]:
+    """Mark up to limit of a worker's queued runs as running and return them, oldest first."""
+    with transaction() as conn:
+        cursor = conn.execute('''
+            UPDATE trader_jobs SET status = 'running', claimed_at = ?
+            WHERE id IN (
+                SELECT id FROM trader_jobs WHERE worker = ? AND status = 'queued' ORDER BY id LIMIT ?
+            )
+            RETURNING id, name, trade, scheduled_at
+        ''', (time.time(), worker, limit))
+        jobs = [
+            {"id": id, "name": name, "trade": bool(trade), "scheduled_at": scheduled_at}
+            for id, name, trade, scheduled_at in cursor
+        ]
+    return sorted(jobs, key=lambda job: job["id"])
+
+def finish_trader_job(job_id: int, status: str = "done") -> None:
+    with transaction() as conn:
+        conn.execute('UPDATE trader_jobs SET status = ? WHERE id = ?', (status, job_id))
+
+def expire_trader_jobs(claimed_before: float) -> int:
+    """
+    Give up on runs claimed before a time, whose worker must have died, and delete finished
+    runs; their timings are kept in trader_runs. Returns the number of runs abandoned.
+    """
+    with transaction() as conn:
+        abandoned = conn.execute(
+            "UPDATE trader_jobs SET status = 'abandoned' WHERE status = 'running' AND claimed_at < ?", (claimed_before,)
+        ).rowcount
+        conn.execute("DELETE FROM trader_jobs WHERE status NOT IN ('queued', 'running')")
+    return abandoned
+
+migrate()
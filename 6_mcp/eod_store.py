@@ -0,0 +1,103 @@
+import mmap
+import os
+import struct
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+# End-of-day snapshots stored one file per date in a compact columnar layout:
+#
+#   header   magic "EOD1", uint32 count, uint32 width, 4 bytes padding
+#   tickers  count fixed-width ASCII fields, NUL padded, sorted
+#   prices   count little-endian float64, in ticker order
+#
+# A reader memory-maps the file and binary-searches the ticker column, so a fresh
+# process answers its first price lookup without parsing anything.
+
+MARKET_DATA_DIR = os.getenv("MARKET_DATA_DIR", "market_data")
+
+MAGIC = b"EOD1"
+HEADER = struct.Struct("<4sII4x")
+PRICE = struct.Struct("<d")
+
+
+def snapshot_path(date: str) -> str:
+    return os.path.join(MARKET_DATA_DIR, f"eod-{date}.bin")
+
+
+def write_snapshot(date: str, prices: dict[str, float]) -> str:
+    """Write a date's prices as a columnar snapshot file, atomically, and return its path."""
+    tickers = sorted(ticker.encode("ascii") for ticker in prices)
+    width = max((len(ticker) for ticker in tickers), default=1)
+    width = (width + 7) // 8 * 8
+    path = snapshot_path(date)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(tickers), width))
+        f.write(b"".join(ticker.ljust(width, b"\0") for ticker in tickers))
+        f.write(b"".join(PRICE.pack(prices[ticker.decode("ascii")]) for ticker in tickers))
+    os.replace(temp_path, path)
+    return path
+
+
+class EODSnapshot:
+    """A read-only, memory-mapped view of one date's snapshot file with dict-style lookups."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.width = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an EOD snapshot")
+        self._tickers = HEADER.size
+        self._prices = HEADER.size + self.count * self.width
+        self._memo: dict[str, float | None] = {}
+
+    @classmethod
+    def open(cls, date: str) -> "EODSnapshot | None":
+        path = snapshot_path(date)
+        return cls(path) if os.path.exists(path) else None
+
+    def _ticker(self, index: int) -> bytes:
+        start = self._tickers + index * self.width
+        return self._map[start:start + self.width]
+
+    def _find(self, symbol: str) -> int:
+        try:
+            key = symbol.encode("ascii").ljust(self.width, b"\0")
+        except UnicodeEncodeError:
+            return -1
+        if len(key) > self.width:
+            return -1
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._ticker(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < self.count and self._ticker(low) == key else -1
+
+    def get(self, symbol: str, default: float = 0.0) -> float:
+        if symbol not in self._memo:
+            index = self._find(symbol)
+            price = PRICE.unpack_from(self._map, self._prices + index * PRICE.size)[0] if index >= 0 else None
+            self._memo[symbol] = price
+        price = self._memo[symbol]
+        return default if price is None else price
+
+    def __contains__(self, symbol: str) -> bool:
+        return self._find(symbol) >= 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def to_dict(self) -> dict[str, float]:
+        return {
+            self._ticker(i).rstrip(b"\0").decode("ascii"): PRICE.unpack_from(self._map, self._prices + i * PRICE.size)[0]
+            for i in range(self.count)
+        }
+
+    def close(self) -> None:
+        self._map.close()
@@ -0,0 +1,46 @@
+import importlib
+from contextlib import asynccontextmanager
+import anyio
+from agents.mcp import MCPServerStdio
+from agents.mcp.server import _MCPServerWithClientSession
+from mcp.shared.memory import create_client_server_memory_streams
+
+# This repo's own FastMCP servers (accounts, market, push, time) can run inside the agent's
+# process: the client session talks to the server over in-memory streams, so a tool call is
+# a couple of queue hand-offs instead of a subprocess and JSON over pipes. Their params in
+# mcp_params.py are then {"module": "accounts_server"} rather than a command to run.
+#
+# The server shares the caller's event loop, so a tool that blocks (a Polygon request, a push
+# notification) holds up the other traders for its duration, as it would with any local call.
+#
+# It builds on two private hooks, the Agents SDK's _MCPServerWithClientSession and FastMCP's
+# _mcp_server, so pyproject.toml pins openai-agents and mcp to the versions it was tested with.
+
+
+class MCPServerInProcess(_MCPServerWithClientSession):
+    """An MCP server for a FastMCP module, served on the current event loop."""
+
+    def __init__(self, params: dict, cache_tools_list: bool = False, name: str | None = None, client_session_timeout_seconds: float | None = 5):
+        super().__init__(cache_tools_list=cache_tools_list, client_session_timeout_seconds=client_session_timeout_seconds)
+        self.params = params
+        self._name = name or f"inprocess: {params['module']}"
+
+    @asynccontextmanager
+    async def create_streams(self):
+        server = importlib.import_module(self.params["module"]).mcp._mcp_server
+        async with create_client_server_memory_streams() as (client_streams, (server_read, server_write)):
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(server.run, server_read, server_write, server.create_initialization_options())
+                yield client_streams
+                tg.cancel_scope.cancel()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+
+def make_mcp_server(params: dict, **kwargs):
+    """An MCPServerStdio for a command's params, or an MCPServerInProcess for a module's."""
+    if "module" in params:
+        return MCPServerInProcess(params, **kwargs)
+    return MCPServerStdio(params, **kwargs)
@@ -0,0 +1,137 @@
+import json
+import os
+from dotenv import load_dotenv
+from database import get_connection, transaction
+
+load_dotenv(override=True)
+
+# The account ledger: every change to an account is an append-only event, and every
+# SNAPSHOT_EVERY events the resulting state is snapshotted, so loading an account is
+# the latest snapshot plus a short tail replay. State is {balance, strategy, holdings}
+# plus the running aggregates {cost_basis, net_invested, realized_pnl}; event types are
+# deposit, withdraw, buy, sell, strategy and reset.
+
+SNAPSHOT_EVERY = int(os.getenv("LEDGER_SNAPSHOT_EVERY", "100"))
+
+def empty_state(balance: float = 0.0, strategy: str = "") -> dict:
+    return {
+        "balance": balance,
+        "strategy": strategy,
+        "holdings": {},
+        "cost_basis": {},
+        "net_invested": 0.0,
+        "realized_pnl": 0.0,
+    }
+
+
+def apply_event(state: dict, type: str, data: dict) -> dict:
+    """
+    Apply one event to a state dict in place and return it.
+    Trades also maintain the per-symbol average cost, the net cash invested in shares and
+    the realized profit, so P&L never needs a scan over the transaction history.
+    """
+    holdings, cost_basis = state["holdings"], state["cost_basis"]
+    if type == "deposit":
+        state["balance"] += data["amount"]
+    elif type == "withdraw":
+        state["balance"] -= data["amount"]
+    elif type == "buy":
+        symbol, quantity, price = data["symbol"], data["quantity"], data["price"]
+        held = holdings.get(symbol, 0)
+        cost_basis[symbol] = (held * cost_basis.get(symbol, 0.0) + quantity * price) / (held + quantity)
+        state["balance"] -= quantity * price
+        state["net_invested"] += quantity * price
+        holdings[symbol] = held + quantity
+    elif type == "sell":
+        symbol, quantity, price = data["symbol"], data["quantity"], data["price"]
+        state["balance"] += quantity * price
+        state["net_invested"] -= quantity * price
+        state["realized_pnl"] += quantity * (price - cost_basis.get(symbol, 0.0))
+        holdings[symbol] = holdings.get(symbol, 0) - quantity
+        if holdings[symbol] == 0:
+            del holdings[symbol]
+            cost_basis.pop(symbol, None)
+    elif type == "strategy":
+        state["strategy"] = data["strategy"]
+    elif type == "reset":
+        state.update(empty_state(data["balance"], data["strategy"]))
+    else:
+        raise ValueError(f"Unknown ledger event {type}")
+    return state
+
+
+def append_events(name: str, events: list[tuple[str, str, dict]]) -> int:
+    """
+    Append (timestamp, type, data) events for an account and return the last event id.
+    Joins the caller's transaction when there is one.
+    """
+    last_id = 0
+    with transaction() as conn:
+        for timestamp, type, data in events:
+            cursor = conn.execute(
+                "INSERT INTO account_events (name, timestamp, type, data) VALUES (?, ?, ?, ?)",
+                (name.lower(), timestamp, type, json.dumps(data)),
+            )
+            last_id = cursor.lastrowid
+    return last_id
+
+
+def write_snapshot(name: str, event_id: int, timestamp: str, state: dict) -> None:
+    with transaction() as conn:
+        conn.execute('''
+            INSERT INTO account_snapshots (name, event_id, timestamp, state)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(name, event_id) DO UPDATE SET state=excluded.state
+        ''', (name.lower(), event_id, timestamp, json.dumps(state)))
+
+
+def replay(name: str, until: str | None = None) -> tuple[dict, int, int] | None:
+    """
+    Reconstruct an account's state from its ledger.
+
+    Args:
+        name: The account name
+        until: If given, a "%Y-%m-%d %H:%M:%S" timestamp; only events up to it are applied
+
+    Returns:
+        (state, last_event_id, events_since_snapshot), or None if the account has no ledger
+    """
+    name = name.lower()
+    until = until or "9999"
+    conn = get_connection()
+    snapshot = conn.execute('''
+        SELECT event_id, state FROM account_snapshots
+        WHERE name = ? AND timestamp <= ?
+        ORDER BY event_id DESC
+        LIMIT 1
+    ''', (name, until)).fetchone()
+    if snapshot:
+        event_id, state = snapshot[0], {**empty_state(), **json.loads(snapshot[1])}
+    else:
+        event_id, state = 0, None
+    # Any event past the next snapshot is later than `until`, so the tail stops there
+    next_snapshot = conn.execute(
+        "SELECT MIN(event_id) FROM account_snapshots WHERE name = ? AND event_id > ?", (name, event_id)
+    ).fetchone()[0]
+    tail = conn.execute('''
+        SELECT id, type, data FROM account_events
+        WHERE name = ? AND id > ? AND id <= ? AND timestamp <= ?
+        ORDER BY id
+    ''', (name, event_id, next_snapshot or 2**63 - 1, until)).fetchall()
+    if state is None:
+        if not tail:
+            return None
+        state = empty_state()
+    for event_id, type, data in tail:
+        apply_event(state, type, json.loads(data))
+    return state, event_id, len(tail)
+
+
+def read_events(name: str, since_id: int = 0) -> list[tuple[int, str, str, dict]]:
+    """Return (id, timestamp, type, data) for an account's events after the given id."""
+    cursor = get_connection().execute('''
+        SELECT id, timestamp, type, data FROM account_events
+        WHERE name = ? AND id > ?
+        ORDER BY id
+    ''', (name.lower(), since_id))
+    return [(event_id, timestamp, type, json.loads(data)) for event_id, timestamp, type, data in cursor]
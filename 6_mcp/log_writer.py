@@ -0,0 +1,172 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from typing import Callable
+
+# A log entry is (name, datetime, type, message); the sink persists a whole batch at once
+
+LogEntry = tuple[str, str, str, str]
+
+_STOP = object()
+
+
+class LogWriter:
+    """
+    Bounded in-memory log queue drained by a background flusher thread.
+
+    Producers (the tracer, Account methods) only enqueue, so they never wait on a SQLite
+    commit. The flusher hands the sink one batch per `batch_size` entries or per
+    `flush_interval_ms`, whichever comes first. When the queue is full a producer waits
+    up to `block_ms` for room (counted as `blocked`) and then drops the entry (`dropped`).
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[list[LogEntry]], None],
+        max_queue: int = 10_000,
+        batch_size: int = 200,
+        flush_interval_ms: int = 250,
+        block_ms: int = 50,
+    ):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.block_timeout = block_ms / 1000
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        # Held while checking _closed and queueing, so nothing is queued behind shutdown's _STOP
+        self._write_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pid = None
+        self._closed = False
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.blocked = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+
+    def write(self, entry: LogEntry) -> bool:
+        """Queue an entry for the next batch. Returns False if it had to be dropped."""
+        with self._write_lock:
+            if not self._closed:
+                return self._enqueue(entry)
+        self.sink([entry])
+        self._count(written=1)
+        return True
+
+    def _enqueue(self, entry: LogEntry) -> bool:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self._count(blocked=1)
+            try:
+                self._queue.put(entry, timeout=self.block_timeout)
+            except queue.Full:
+                self._count(dropped=1)
+                return False
+        self._count(enqueued=1)
+        return True
+
+    def _count(self, **counts: int) -> None:
+        with self._stats_lock:
+            for counter, n in counts.items():
+                setattr(self, counter, getattr(self, counter) + n)
+
+    def force_flush(self, timeout: float | None = 5.0) -> bool:
+        """Block until everything queued before this call has been handed to the sink."""
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        with self._write_lock:
+            if self._closed:
+                return True
+            self._queue.put(done)
+        return done.wait(timeout)
+
+    def shutdown(self, timeout: float | None = 5.0) -> None:
+        """Flush what is queued and stop the flusher; later writes go straight to the sink."""
+        with self._write_lock:
+            if self._closed:
+                return
+            self._closed = True
+            running = self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()
+            if running:
+                self._queue.put(_STOP)
+        if running:
+            self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "blocked": self.blocked,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def _flush(self, batch: list[LogEntry]) -> None:
+        if not batch:
+            return
+        try:
+            self.sink(batch)
+            self._count(written=len(batch), batches=1)
+        except Exception as e:
+            self._count(failed=len(batch))
+            print(f"Log writer failed to persist {len(batch)} entries: {e}")
+        batch.clear()
+
+    def _run(self) -> None:
+        batch: list[LogEntry] = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._flush(batch)
+                deadline = None
+                continue
+            if item is _STOP:
+                self._flush(batch)
+                return
+            if isinstance(item, threading.Event):
+                self._flush(batch)
+                deadline = None
+                item.set()
+                continue
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                deadline = None
+
+
+def create_log_writer(sink: Callable[[list[LogEntry]], None]) -> LogWriter:
+    """Build a LogWriter configured from the LOG_* environment variables, flushed at exit."""
+    writer = LogWriter(
+        sink,
+        max_queue=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+        batch_size=int(os.getenv("LOG_BATCH_SIZE", "200")),
+        flush_interval_ms=int(os.getenv("LOG_FLUSH_INTERVAL_MS", "250")),
+        block_ms=int(os.getenv("LOG_QUEUE_BLOCK_MS", "50")),
+    )
+    atexit.register(writer.shutdown)
+    return writer
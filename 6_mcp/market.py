@@ -2,8 +2,10 @@ from polygon import RESTClient
 from dotenv import load_dotenv
 import os
 from datetime import datetime
-import random
+import market_simulator
 from database import write_market, read_market
+from quote_cache import QuoteCache
+from eod_store import EODSnapshot, write_snapshot
 from functools import lru_cache
 from datetime import timezone
 
@@ -15,16 +17,36 @@ polygon_plan = os.getenv("POLYGON_PLAN")
 is_paid_polygon = polygon_plan == "paid"
 is_realtime_polygon = polygon_plan == "realtime"
 
+# Live quotes are cached for a plan-dependent freshness window: the paid plan's data is
+# already 15 minutes delayed, so a minute of caching costs nothing; realtime keeps it short
+
+QUOTE_TTL_SECONDS = float(os.getenv("QUOTE_TTL_SECONDS", "2" if is_realtime_polygon else "60"))
+
+quote_cache = QuoteCache(QUOTE_TTL_SECONDS, shared=os.getenv("QUOTE_CACHE_SHARED", "true").lower() == "true")
+
+
+@lru_cache(maxsize=1)
+def get_polygon_client() -> RESTClient:
+    """One shared client, so its HTTP connection pool is reused across calls"""
+    return RESTClient(polygon_api_key)
+
+
+def clock_speed() -> float:
+    """Simulated seconds per real second: 1 against Polygon, MARKET_SIM_SPEED when simulating"""
+    return 1.0 if polygon_api_key else market_simulator.SPEED
+
 
 def is_market_open() -> bool:
-    client = RESTClient(polygon_api_key)
+    if not polygon_api_key:
+        return market_simulator.is_market_open()
+    client = get_polygon_client()
     market_status = client.get_market_status()
     return market_status.market == "open"
 
 
 def get_all_share_prices_polygon_eod() -> dict[str, float]:
     """With much thanks to student Reema R. for fixing the timezone issue with this!"""
-    client = RESTClient(polygon_api_key)
+    client = get_polygon_client()
 
     probe = client.get_previous_close_agg("SPY")[0]
     last_close = datetime.fromtimestamp(probe.timestamp / 1000, tz=timezone.utc).date()
@@ -34,12 +56,20 @@ def get_all_share_prices_polygon_eod() -> dict[str, float]:
 
 
 @lru_cache(maxsize=2)
-def get_market_for_prior_date(today):
-    market_data = read_market(today)
-    if not market_data:
-        market_data = get_all_share_prices_polygon_eod()
-        write_market(today, market_data)
-    return market_data
+def get_market_for_prior_date(today) -> EODSnapshot:
+    """
+    The prior close for every ticker, as a memory-mapped columnar snapshot.
+    Falls back to the JSON copy in the market table, then to Polygon, writing both copies.
+    """
+    snapshot = EODSnapshot.open(today)
+    if snapshot is None:
+        market_data = read_market(today)
+        if not market_data:
+            market_data = get_all_share_prices_polygon_eod()
+            write_market(today, market_data)
+        write_snapshot(today, market_data)
+        snapshot = EODSnapshot.open(today)
+    return snapshot
 
 
 def get_share_price_polygon_eod(symbol) -> float:
@@ -48,23 +78,77 @@ def get_share_price_polygon_eod(symbol) -> float:
     return market_data.get(symbol, 0.0)
 
 
-def get_share_price_polygon_min(symbol) -> float:
-    client = RESTClient(polygon_api_key)
+def get_share_prices_polygon_eod(symbols) -> dict[str, float]:
+    today = datetime.now().date().strftime("%Y-%m-%d")
+    market_data = get_market_for_prior_date(today)
+    return {symbol: market_data.get(symbol, 0.0) for symbol in symbols}
+
+
+def snapshot_price(result) -> float:
+    """A ticker snapshot's last minute close, else its previous close; 0.0 (unpriced) when it has neither"""
+    return getattr(result.min, "close", None) or getattr(result.prev_day, "close", None) or 0.0
+
+
+def fetch_share_price_polygon_min(symbol) -> float:
+    client = get_polygon_client()
     result = client.get_snapshot_ticker("stocks", symbol)
-    return result.min.close or result.prev_day.close
+    return snapshot_price(result)
+
 
+def fetch_share_prices_polygon_min(symbols) -> dict[str, float]:
+    """One snapshot request for all the symbols; any the snapshot omits are unrecognized (0.0)"""
+    client = get_polygon_client()
+    results = client.get_snapshot_all("stocks", tickers=list(symbols))
+    prices = {symbol: 0.0 for symbol in symbols}
+    for result in results:
+        if result.ticker in prices:
+            prices[result.ticker] = snapshot_price(result)
+    return prices
 
+
+def get_share_price_polygon_min(symbol) -> float:
+    return quote_cache.get(symbol, fetch_share_price_polygon_min)
+
+
+def get_share_prices_polygon_min(symbols) -> dict[str, float]:
+    return quote_cache.get_many(symbols, fetch_share_prices_polygon_min)
+
+
+# The paid and realtime plans price trades from live snapshots, and only the free plan uses
+# the prior close. Realtime accounts used to be priced at the prior close too, even though
+# their traders read live prices through the Polygon MCP server (mcp_params.py). They then
+# traded at prices they had never seen.
 def get_share_price_polygon(symbol) -> float:
-    if is_paid_polygon:
+    if is_paid_polygon or is_realtime_polygon:
         return get_share_price_polygon_min(symbol)
     else:
         return get_share_price_polygon_eod(symbol)
 
 
+def get_share_prices_polygon(symbols) -> dict[str, float]:
+    if is_paid_polygon or is_realtime_polygon:
+        return get_share_prices_polygon_min(symbols)
+    else:
+        return get_share_prices_polygon_eod(symbols)
+
+
 def get_share_price(symbol) -> float:
     if polygon_api_key:
         try:
             return get_share_price_polygon(symbol)
         except Exception as e:
-            print(f"Was not able to use the polygon API due to {e}; using a random number")
-    return float(random.randint(1, 100))
+            print(f"Was not able to use the polygon API due to {e}; using the market simulator")
+    return market_simulator.get_share_price(symbol)
+
+
+def get_share_prices(symbols) -> dict[str, float]:
+    """Price many symbols at once: one dict lookup per symbol on EOD data, one request on the paid plan"""
+    symbols = set(symbols)
+    if not symbols:
+        return {}
+    if polygon_api_key:
+        try:
+            return get_share_prices_polygon(symbols)
+        except Exception as e:
+            print(f"Was not able to use the polygon API due to {e}; using the market simulator")
+    return market_simulator.get_share_prices(symbols)
@@ -1,5 +1,6 @@
 from mcp.server.fastmcp import FastMCP
-from market import get_share_price
+from market import get_share_price, is_market_open
+from price_history import get_price_history
 
 mcp = FastMCP("market_server")
 
@@ -12,5 +13,22 @@ async def lookup_share_price(symbol: str) -> float:
     """
     return get_share_price(symbol)
 
+@mcp.tool()
+async def market_is_open() -> bool:
+    """This tool reports whether the stock market is currently open for trading."""
+    return is_market_open()
+
+@mcp.tool()
+async def lookup_price_history(symbol: str, start: str, end: str) -> list[dict]:
+    """This tool provides the daily open, high, low, close and volume of the given stock symbol over a date range.
+
+    Args:
+        symbol: the symbol of the stock
+        start: the first date, as YYYY-MM-DD
+        end: the last date, as YYYY-MM-DD
+    """
+    columns = ("symbol", "date", "open", "high", "low", "close", "volume")
+    return [dict(zip(columns, bar)) for bar in get_price_history(symbol, start, end)]
+
 if __name__ == "__main__":
     mcp.run(transport='stdio')
\ No newline at end of file
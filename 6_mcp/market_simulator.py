@@ -0,0 +1,221 @@
+import hashlib
+import math
+import os
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+# A seeded, offline stand-in for Polygon. Every price is a pure function of (seed, ticker,
+# time), so separate processes (market_server.py, accounts_server.py, the dashboard) agree.
+#
+# - Daily closes follow geometric Brownian motion from a 2020 epoch, with a one-factor model
+#   correlating every ticker to a common market move by its beta
+# - Intraday ticks are a Brownian bridge from the previous close to the day's close
+# - Sessions follow the NYSE calendar: 9:30 to 16:00 New York time on trading days
+# - The clock can run faster than real time: MARKET_SIM_SPEED simulated seconds per second.
+#   A sped-up clock starts at MARKET_SIM_START (default 2024-01-01 UTC) when the run starts at
+#   MARKET_SIM_REAL_START, a unix time set by the first process to import this module and
+#   passed on to the servers and workers it starts, so they all read the same clock
+
+SEED = int(os.getenv("MARKET_SIM_SEED", "42"))
+SPEED = float(os.getenv("MARKET_SIM_SPEED", "1"))
+SIM_START = float(os.getenv("MARKET_SIM_START", "1704067200"))  # 2024-01-01 00:00 UTC
+REAL_START = float(os.environ.setdefault("MARKET_SIM_REAL_START", str(time.time())))
+
+EPOCH = date(2020, 1, 2)
+TICK_SECONDS = 60
+TRADING_DAYS_PER_YEAR = 252
+NEW_YORK = ZoneInfo("America/New_York")
+OPEN = (9, 30)
+CLOSE = (16, 0)
+
+
+def sim_now() -> datetime:
+    """The simulated wall clock, in UTC: the real one at speed 1, else sped up from SIM_START."""
+    if SPEED == 1:
+        return datetime.now(timezone.utc)
+    return datetime.fromtimestamp(SIM_START + (time.time() - REAL_START) * SPEED, tz=timezone.utc)
+
+
+def _rng(*key) -> random.Random:
+    digest = hashlib.blake2b(":".join(map(str, (SEED, *key))).encode(), digest_size=8).digest()
+    return random.Random(int.from_bytes(digest, "big"))
+
+
+# Trading calendar
+
+
+def _easter(year: int) -> date:
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> date:
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=64)
+def holidays(year: int) -> frozenset[date]:
+    days = {
+        _observed(date(year, 1, 1)),
+        _nth_weekday(year, 1, 0, 3),
+        _nth_weekday(year, 2, 0, 3),
+        _easter(year) - timedelta(days=2),
+        _last_weekday(year, 5, 0),
+        _observed(date(year, 7, 4)),
+        _nth_weekday(year, 9, 0, 1),
+        _nth_weekday(year, 11, 3, 4),
+        _observed(date(year, 12, 25)),
+    }
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))
+    return frozenset(days)
+
+
+def is_trading_day(day: date) -> bool:
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+@lru_cache(maxsize=4096)
+def trading_day_index(day: date) -> int:
+    """How many trading days lie between the epoch and this day (exclusive)."""
+    if day <= EPOCH:
+        return 0
+    weeks, extra = divmod((day - EPOCH).days, 7)
+    weekdays = weeks * 5 + sum(1 for i in range(extra) if (EPOCH.weekday() + i) % 7 < 5)
+    closed = sum(
+        1
+        for year in range(EPOCH.year, day.year + 1)
+        for holiday in holidays(year)
+        if EPOCH <= holiday < day and holiday.weekday() < 5
+    )
+    return weekdays - closed
+
+
+def session(day: date) -> tuple[datetime, datetime]:
+    opens = datetime(day.year, day.month, day.day, *OPEN, tzinfo=NEW_YORK)
+    closes = datetime(day.year, day.month, day.day, *CLOSE, tzinfo=NEW_YORK)
+    return opens, closes
+
+
+def is_market_open(at: datetime | None = None) -> bool:
+    at = (at or sim_now()).astimezone(NEW_YORK)
+    if not is_trading_day(at.date()):
+        return False
+    opens, closes = session(at.date())
+    return opens <= at < closes
+
+
+# Price paths
+
+
+@lru_cache(maxsize=None)
+def _ticker_params(symbol: str) -> tuple[float, float, float, float]:
+    """(start price, annual drift, annual volatility, market beta) for a ticker."""
+    rng = _rng("params", symbol)
+    return rng.uniform(20, 500), rng.uniform(0.0, 0.12), rng.uniform(0.15, 0.6), rng.uniform(0.3, 0.8)
+
+
+_lock = threading.RLock()
+
+
+class _Path:
+    """Memoized daily log closes for one ticker, extended on demand."""
+
+    def __init__(self, symbol: str):
+        self.start, self.drift, self.volatility, self.beta = _ticker_params(symbol)
+        self.rng = _rng("daily", symbol)
+        self.log_closes = [math.log(self.start)]
+
+    def log_close(self, index: int) -> float:
+        dt = 1 / TRADING_DAYS_PER_YEAR
+        idiosyncratic = math.sqrt(1 - self.beta ** 2)
+        with _lock:
+            while len(self.log_closes) <= index:
+                shock = self.beta * _market_shock(len(self.log_closes)) + idiosyncratic * self.rng.gauss(0, 1)
+                step = (self.drift - self.volatility ** 2 / 2) * dt + self.volatility * math.sqrt(dt) * shock
+                self.log_closes.append(self.log_closes[-1] + step)
+        return self.log_closes[index]
+
+
+_market_shocks: list[float] = []
+_market_rng = _rng("market")
+
+
+def _market_shock(index: int) -> float:
+    with _lock:
+        while len(_market_shocks) <= index:
+            _market_shocks.append(_market_rng.gauss(0, 1))
+    return _market_shocks[index]
+
+
+@lru_cache(maxsize=None)
+def _path(symbol: str) -> _Path:
+    return _Path(symbol)
+
+
+@lru_cache(maxsize=4096)
+def _intraday(symbol: str, index: int) -> tuple[float, ...]:
+    """Log prices at each tick of trading day `index`, bridging the previous close to its close."""
+    path = _path(symbol)
+    start, end = path.log_close(index - 1) if index else path.log_close(0), path.log_close(index)
+    ticks = (CLOSE[0] * 60 + CLOSE[1] - OPEN[0] * 60 - OPEN[1]) * 60 // TICK_SECONDS
+    tick_volatility = path.volatility * math.sqrt(1 / TRADING_DAYS_PER_YEAR / ticks)
+    rng = _rng("intraday", symbol, index)
+    walk = [0.0]
+    for _ in range(ticks):
+        walk.append(walk[-1] + rng.gauss(0, tick_volatility))
+    return tuple(
+        start + (end - start) * k / ticks + walk[k] - walk[-1] * k / ticks for k in range(ticks + 1)
+    )
+
+
+def get_share_price(symbol: str, at: datetime | None = None) -> float:
+    """The simulated price of a ticker: the latest tick in session, else the last close."""
+    at = (at or sim_now()).astimezone(NEW_YORK)
+    day = at.date()
+    if day < EPOCH:
+        return round(_ticker_params(symbol)[0], 2)
+    if is_trading_day(day):
+        opens, closes = session(day)
+        index = trading_day_index(day)
+        if at >= closes:
+            return round(math.exp(_path(symbol).log_close(index)), 2)
+        if at >= opens:
+            tick = int((at - opens).total_seconds()) // TICK_SECONDS
+            return round(math.exp(_intraday(symbol, index)[tick]), 2)
+    # Before the open or on a closed day, the last completed session's close applies
+    index = trading_day_index(day) - 1
+    return round(math.exp(_path(symbol).log_close(max(index, 0))), 2)
+
+
+def get_share_prices(symbols, at: datetime | None = None) -> dict[str, float]:
+    at = at or sim_now()
+    return {symbol: get_share_price(symbol, at) for symbol in symbols}
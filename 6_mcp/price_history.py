@@ -0,0 +1,129 @@
+import argparse
+import csv
+from datetime import date, timedelta
+from dotenv import load_dotenv
+from database import get_connection, transaction
+
+load_dotenv(override=True)
+
+# Daily OHLCV bars keyed by (symbol, date). The price_history table is WITHOUT ROWID with
+# that primary key, so each symbol's bars are stored contiguously in date order and a
+# range query is a single b-tree seek plus a sequential read, however many tickers and
+# years are loaded.
+
+BACKFILL_BATCH = 50_000
+
+Bar = tuple[str, str, float, float, float, float, float]
+
+
+def write_bars(bars) -> int:
+    """Upsert (symbol, date, open, high, low, close, volume) bars in batched transactions."""
+    written = 0
+    batch = []
+    for bar in bars:
+        batch.append(bar)
+        if len(batch) >= BACKFILL_BATCH:
+            written += _write_batch(batch)
+            batch = []
+    return written + _write_batch(batch)
+
+
+def _write_batch(batch: list[Bar]) -> int:
+    with transaction() as conn:
+        conn.executemany('''
+            INSERT INTO price_history (symbol, date, open, high, low, close, volume)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(symbol, date) DO UPDATE SET
+                open=excluded.open, high=excluded.high, low=excluded.low,
+                close=excluded.close, volume=excluded.volume
+        ''', batch)
+    return len(batch)
+
+
+def get_price_history(symbol: str, start: str, end: str) -> list[Bar]:
+    """Return the daily bars for a symbol between two "%Y-%m-%d" dates inclusive, oldest first."""
+    cursor = get_connection().execute('''
+        SELECT symbol, date, open, high, low, close, volume FROM price_history
+        WHERE symbol = ? AND date BETWEEN ? AND ?
+        ORDER BY date
+    ''', (symbol, start, end))
+    return cursor.fetchall()
+
+
+def get_close_on(symbol: str, on: str) -> float | None:
+    """The most recent close on or before a date, or None if the store has none."""
+    row = get_connection().execute('''
+        SELECT close FROM price_history
+        WHERE symbol = ? AND date <= ?
+        ORDER BY date DESC
+        LIMIT 1
+    ''', (symbol, on)).fetchone()
+    return row[0] if row else None
+
+
+# Backfill sources
+
+
+def read_csv_bars(path: str):
+    """Bars from a CSV with symbol, date, open, high, low, close, volume columns (any order)."""
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            yield (
+                row["symbol"],
+                row["date"][:10],
+                float(row["open"]),
+                float(row["high"]),
+                float(row["low"]),
+                float(row["close"]),
+                float(row["volume"] or 0),
+            )
+
+
+def read_parquet_bars(path: str):
+    """Bars from a Parquet dump with the same columns as the CSV; needs pandas with pyarrow."""
+    import pandas as pd
+
+    frame = pd.read_parquet(path, columns=["symbol", "date", "open", "high", "low", "close", "volume"])
+    frame["date"] = pd.to_datetime(frame["date"]).dt.strftime("%Y-%m-%d")
+    yield from frame.itertuples(index=False, name=None)
+
+
+def read_polygon_bars(start: str, end: str, client=None):
+    """Bars for every ticker from Polygon's grouped daily aggregates, one request per day."""
+    if client is None:
+        from market import get_polygon_client
+
+        client = get_polygon_client()
+    day = date.fromisoformat(start)
+    while day <= date.fromisoformat(end):
+        if day.weekday() < 5:
+            for result in client.get_grouped_daily_aggs(day, adjusted=True, include_otc=False):
+                yield (result.ticker, day.isoformat(), result.open, result.high, result.low, result.close, result.volume or 0)
+        day += timedelta(days=1)
+
+
+def backfill(source: str, path: str | None = None, start: str | None = None, end: str | None = None) -> int:
+    if source == "csv":
+        bars = read_csv_bars(path)
+    elif source == "parquet":
+        bars = read_parquet_bars(path)
+    elif source == "polygon":
+        bars = read_polygon_bars(start, end)
+    else:
+        raise ValueError(f"Unknown backfill source {source}")
+    return write_bars(bars)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill the local daily price history")
+    parser.add_argument("source", choices=["csv", "parquet", "polygon"])
+    parser.add_argument("--path", help="the CSV or Parquet dump to load")
+    parser.add_argument("--start", help="first date to fetch from Polygon, YYYY-MM-DD")
+    parser.add_argument("--end", default=date.today().isoformat(), help="last date to fetch from Polygon")
+    args = parser.parse_args()
+    if args.source == "polygon" and not args.start:
+        parser.error("--start is required for polygon")
+    if args.source != "polygon" and not args.path:
+        parser.error(f"--path is required for {args.source}")
+    count = backfill(args.source, args.path, args.start, args.end)
+    print(f"Backfilled {count:,} bars")
@@ -0,0 +1,96 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+from database import read_quotes, write_quotes
+
+
+class QuoteCache:
+    """
+    Process-wide quote cache with a freshness TTL.
+
+    Concurrent misses for the same symbol are coalesced: the first caller fetches while
+    the others wait on its result. With `shared` set, quotes are also read from and written
+    to the quotes table, so separate MCP server processes reuse each other's fetches.
+    """
+
+    def __init__(self, ttl_seconds: float, shared: bool = True):
+        self.ttl = ttl_seconds
+        self.shared = shared
+        self._quotes: dict[str, tuple[float, float]] = {}
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def get(self, symbol: str, fetch: Callable[[str], float]) -> float:
+        return self.get_many([symbol], lambda symbols: {s: fetch(s) for s in symbols})[symbol]
+
+    def get_many(self, symbols, fetch: Callable[[list[str]], dict[str, float]]) -> dict[str, float]:
+        """Return fresh prices for the symbols, calling fetch once for those nobody has in hand."""
+        now = time.time()
+        prices, waiting, leading = {}, {}, []
+        with self._lock:
+            for symbol in symbols:
+                quote = self._quotes.get(symbol)
+                if quote and now - quote[1] < self.ttl:
+                    prices[symbol] = quote[0]
+                    self.hits += 1
+                elif symbol in self._inflight:
+                    waiting[symbol] = self._inflight[symbol]
+                    self.coalesced += 1
+                else:
+                    self._inflight[symbol] = Future()
+                    leading.append(symbol)
+        if leading:
+            try:
+                quotes = self._load(leading, fetch)
+            except BaseException as e:
+                with self._lock:
+                    self.errors += 1
+                    for symbol in leading:
+                        self._inflight.pop(symbol).set_exception(e)
+                raise
+            with self._lock:
+                for symbol in leading:
+                    # An unpriced symbol comes back as 0.0; hand it out but fetch it again next time
+                    if quotes[symbol][0] > 0:
+                        self._quotes[symbol] = quotes[symbol]
+                    self._inflight.pop(symbol).set_result(quotes[symbol][0])
+            prices.update({symbol: quote[0] for symbol, quote in quotes.items()})
+        for symbol, future in waiting.items():
+            prices[symbol] = future.result()
+        return prices
+
+    def _load(self, symbols: list[str], fetch) -> dict[str, tuple[float, float]]:
+        quotes = read_quotes(symbols, time.time() - self.ttl) if self.shared else {}
+        missing = [symbol for symbol in symbols if symbol not in quotes]
+        with self._lock:
+            self.shared_hits += len(quotes)
+            self.misses += len(missing)
+        if missing:
+            fetched_at = time.time()
+            fetched = fetch(missing)
+            fresh = {symbol: (fetched[symbol], fetched_at) for symbol in missing}
+            if self.shared:
+                write_quotes({symbol: quote for symbol, quote in fresh.items() if quote[0] > 0})
+            quotes.update(fresh)
+        return quotes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._quotes.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.shared_hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "hit_rate": (lookups - self.misses) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,120 @@
+import gzip
+import json
+import os
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pydantic import BaseModel
+from dotenv import load_dotenv
+from database import get_connection, transaction
+from timeseries import compact_portfolio_values
+
+load_dotenv(override=True)
+
+# Logs older than the policy's age, or beyond its newest max_rows, are rolled up into
+# per-hour counts by type and deleted; archived rows optionally go to gzipped JSONL segments
+
+LOG_ARCHIVE_DIR = os.getenv("LOG_ARCHIVE_DIR", "")
+COMPACTION_BATCH = 5_000
+VACUUM_PAGES = int(os.getenv("RETENTION_VACUUM_PAGES", "2000"))
+
+
+class RetentionPolicy(BaseModel):
+    max_age_days: float = float(os.getenv("LOG_RETENTION_DAYS", "7"))
+    max_rows: int = int(os.getenv("LOG_RETENTION_MAX_ROWS", "50000"))
+
+
+def load_policies() -> dict[str, RetentionPolicy]:
+    """Per-trader overrides from LOG_RETENTION_POLICIES, e.g. {"warren": {"max_rows": 10000}}"""
+    overrides = json.loads(os.getenv("LOG_RETENTION_POLICIES", "{}"))
+    return {name.lower(): RetentionPolicy(**policy) for name, policy in overrides.items()}
+
+
+def _archive(name: str, rows: list[tuple]) -> None:
+    directory = os.path.join(LOG_ARCHIVE_DIR, name)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{rows[0][0]:012d}-{rows[-1][0]:012d}.jsonl.gz")
+    with gzip.open(path, "wt", encoding="utf-8") as segment:
+        for log_id, when, type, message in rows:
+            segment.write(json.dumps({"id": log_id, "datetime": when, "type": type, "message": message}))
+            segment.write("\n")
+
+
+def compact_trader_logs(name: str, policy: RetentionPolicy, archive: bool = bool(LOG_ARCHIVE_DIR)) -> int:
+    """
+    Roll up and delete the expired logs of one trader, in short transactions of
+    COMPACTION_BATCH rows so writers are never locked out for long.
+    Returns the number of rows removed.
+    """
+    name = name.lower()
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=policy.max_age_days)).strftime("%Y-%m-%d %H:%M:%S")
+    row = get_connection().execute(
+        "SELECT id FROM logs WHERE name = ? ORDER BY id DESC LIMIT 1 OFFSET ?", (name, policy.max_rows)
+    ).fetchone()
+    id_cutoff = row[0] if row else 0
+    removed = 0
+    while True:
+        with transaction() as conn:
+            rows = conn.execute('''
+                SELECT id, datetime, type, message FROM logs
+                WHERE name = ? AND (datetime < ? OR id <= ?)
+                ORDER BY id
+                LIMIT ?
+            ''', (name, cutoff, id_cutoff, COMPACTION_BATCH)).fetchall()
+            if not rows:
+                return removed
+            if archive:
+                _archive(name, rows)
+            counts = Counter((when[:13] + ":00:00", type) for _, when, type, _ in rows)
+            conn.executemany('''
+                INSERT INTO log_rollups (name, hour, type, count)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(name, hour, type) DO UPDATE SET count = count + excluded.count
+            ''', [(name, hour, type, count) for (hour, type), count in counts.items()])
+            conn.execute('''
+                DELETE FROM logs
+                WHERE name = ? AND id BETWEEN ? AND ? AND (datetime < ? OR id <= ?)
+            ''', (name, rows[0][0], rows[-1][0], cutoff, id_cutoff))
+        removed += len(rows)
+
+
+def reclaim_space(pages: int = VACUUM_PAGES) -> None:
+    """
+    Return up to `pages` free pages to the filesystem and truncate the WAL.
+    Incremental vacuum needs auto_vacuum=INCREMENTAL; a database created before that was
+    the default is converted once with a full VACUUM.
+    """
+    conn = get_connection()
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    conn.execute(f"PRAGMA incremental_vacuum({pages})")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("PRAGMA optimize")
+
+
+def run_retention(names: list[str] | None = None) -> dict[str, int]:
+    """Compact every trader's logs under its policy and expire old portfolio values, then reclaim the freed space."""
+    policies = load_policies()
+    if names is None:
+        names = [row[0] for row in get_connection().execute("SELECT DISTINCT name FROM logs")]
+    removed = {}
+    for name in names:
+        removed[name.lower()] = compact_trader_logs(name, policies.get(name.lower(), RetentionPolicy()))
+    compact_portfolio_values()
+    reclaim_space()
+    return removed
+
+
+def read_log_rollups(name: str, since: str | None = None) -> list[tuple[str, str, int]]:
+    """Return (hour, type, count) summaries of compacted logs for a trader, oldest first."""
+    cursor = get_connection().execute('''
+        SELECT hour, type, count FROM log_rollups
+        WHERE name = ? AND hour >= ?
+        ORDER BY hour, type
+    ''', (name.lower(), since or ""))
+    return cursor.fetchall()
+
+
+if __name__ == "__main__":
+    for name, count in run_retention().items():
+        print(f"{name}: compacted {count} log rows")
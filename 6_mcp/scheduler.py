@@ -0,0 +1,82 @@
+import asyncio
+import math
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+from database import write_trader_run
+
+# Trader runs start on fixed-rate ticks at multiples of the period since the epoch, so a
+# slow cycle does not push every later one back. At most max_concurrent runs are in flight,
+# each is cancelled at its deadline, and a trader whose last run is still going sits out the
+# tick rather than queueing a second one. Every run, skipped ones included, is recorded in
+# the trader_runs table with how long it waited for a slot and how long it ran.
+
+
+def next_tick(period: float, now: float | None = None) -> float:
+    """The first multiple of the period after now, in epoch seconds."""
+    now = time.time() if now is None else now
+    return (math.floor(now / period) + 1) * period
+
+
+async def sleep_until_next_tick(period: float) -> float:
+    # Ticks missed while a cycle overran are skipped, not run back to back
+    tick = next_tick(period)
+    await asyncio.sleep(max(0.0, tick - time.time()))
+    return tick
+
+
+async def record_run(name: str, scheduled_at: float, queued_seconds: float, run_seconds: float, status: str, error: str | None = None) -> None:
+    when = datetime.fromtimestamp(scheduled_at, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        await asyncio.to_thread(write_trader_run, name, when, queued_seconds, run_seconds, status, error)
+    except Exception as e:
+        print(f"Failed to record run of trader {name}: {e}")
+
+
+class TraderScheduler:
+    def __init__(self, period: float, max_concurrent: int, deadline: float | None = None):
+        self.period = period
+        self.deadline = deadline or period
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.running: dict[str, asyncio.Task] = {}
+
+    def next_tick(self, now: float | None = None) -> float:
+        return next_tick(self.period, now)
+
+    async def sleep_until_next_tick(self) -> float:
+        return await sleep_until_next_tick(self.period)
+
+    async def submit(self, name: str, job: Callable[[], Awaitable], scheduled_at: float) -> bool:
+        """Start a trader's run for a tick unless its previous run is still going."""
+        task = self.running.get(name)
+        if task and not task.done():
+            print(f"Trader {name} is still running, skipping this tick")
+            await record_run(name, scheduled_at, 0.0, 0.0, "skipped")
+            return False
+        self.running[name] = asyncio.create_task(self._run(name, job, scheduled_at))
+        return True
+
+    async def _run(self, name: str, job: Callable[[], Awaitable], scheduled_at: float) -> None:
+        async with self.semaphore:
+            started = time.time()
+            status, error = "ok", None
+            try:
+                await asyncio.wait_for(job(), self.deadline)
+            except asyncio.TimeoutError:
+                status, error = "timeout", f"Cancelled at its {self.deadline:.0f}s deadline"
+                print(f"Trader {name} {error.lower()}")
+            except Exception as e:
+                status, error = "error", str(e)
+                print(f"Error running trader {name}: {e}")
+            finished = time.time()
+        await record_run(name, scheduled_at, started - scheduled_at, finished - started, status, error)
+
+    def active(self) -> int:
+        return sum(not task.done() for task in self.running.values())
+
+    async def stop(self) -> None:
+        """Cancel the runs in flight and wait for them to finish."""
+        tasks = [task for task in self.running.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,114 @@
+import asyncio
+import os
+from dotenv import load_dotenv
+from agents.mcp import MCPServer
+from inprocess_mcp import make_mcp_server
+from mcp_params import (
+    trader_mcp_server_params,
+    shared_researcher_mcp_server_params,
+    memory_mcp_server_params,
+)
+
+load_dotenv(override=True)
+
+# The MCP servers the trading floor keeps running across cycles. Accounts, push, market,
+# fetch and search hold no per-trader state, so one process of each serves every trader;
+# only the researcher's libsql memory is opened per trader, as each has its own database.
+#
+# Every server is entered and exited from the task that owns the fleet (the stdio transport
+# requires it), so the traders' tasks only ever make requests over the open sessions.
+
+CLIENT_SESSION_TIMEOUT_SECONDS = 120
+HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("MCP_HEALTH_CHECK_TIMEOUT_SECONDS", "10"))
+
+
+class ServerFleet:
+    def __init__(self, names: list[str]):
+        self.names = names
+        self.trader_servers: list[MCPServer] = []
+        self.shared_researcher_servers: list[MCPServer] = []
+        self.memory_servers: dict[str, MCPServer] = {}
+        self.restarts = 0
+        self._params: dict[MCPServer, dict] = {}
+
+    def _server(self, params: dict) -> MCPServer:
+        server = make_mcp_server(params, cache_tools_list=True, client_session_timeout_seconds=CLIENT_SESSION_TIMEOUT_SECONDS)
+        self._params[server] = params
+        return server
+
+    async def _start(self, params: dict) -> MCPServer:
+        server = self._server(params)
+        await server.connect()
+        return server
+
+    async def start(self) -> "ServerFleet":
+        starting = [self._start(params) for params in trader_mcp_server_params]
+        starting += [self._start(params) for params in shared_researcher_mcp_server_params]
+        starting += [self._start(memory_mcp_server_params(name)) for name in self.names]
+        servers = await asyncio.gather(*starting, return_exceptions=True)
+        errors = [server for server in servers if isinstance(server, BaseException)]
+        if errors:
+            for server in servers:
+                if not isinstance(server, BaseException):
+                    await server.cleanup()
+            raise errors[0]
+        count = len(trader_mcp_server_params)
+        shared = count + len(shared_researcher_mcp_server_params)
+        self.trader_servers = servers[:count]
+        self.shared_researcher_servers = servers[count:shared]
+        self.memory_servers = dict(zip(self.names, servers[shared:]))
+        return self
+
+    def researcher_servers(self, name: str) -> list[MCPServer]:
+        return [*self.shared_researcher_servers, self.memory_servers[name]]
+
+    @staticmethod
+    async def _healthy(server: MCPServer) -> bool:
+        if server.session is None:
+            return False
+        try:
+            # Not every server implements ping, but they all list their tools
+            await asyncio.wait_for(server.session.list_tools(), HEALTH_CHECK_TIMEOUT_SECONDS)
+            return True
+        except Exception:
+            return False
+
+    async def _restart(self, server: MCPServer) -> MCPServer:
+        print(f"Restarting MCP server {server.name}")
+        self.restarts += 1
+        try:
+            await server.cleanup()
+        except Exception as e:
+            print(f"Error stopping MCP server {server.name}: {e}")
+        replacement = self._server(self._params.pop(server))
+        try:
+            await replacement.connect()
+        except Exception as e:
+            # Left unconnected, so the next check tries again
+            print(f"Error restarting MCP server {server.name}: {e}")
+        return replacement
+
+    async def check(self) -> None:
+        """Probe every server and replace any that has died or stopped answering."""
+        groups = [self.trader_servers, self.shared_researcher_servers]
+        for servers in groups:
+            for i, server in enumerate(servers):
+                if not await self._healthy(server):
+                    servers[i] = await self._restart(server)
+        for name, server in self.memory_servers.items():
+            if not await self._healthy(server):
+                self.memory_servers[name] = await self._restart(server)
+
+    async def stop(self) -> None:
+        servers = [*self.trader_servers, *self.shared_researcher_servers, *self.memory_servers.values()]
+        for server in reversed(servers):
+            try:
+                await server.cleanup()
+            except Exception as e:
+                print(f"Error stopping MCP server {server.name}: {e}")
+
+    async def __aenter__(self) -> "ServerFleet":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
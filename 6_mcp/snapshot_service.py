@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from collections import deque
+from pydantic import BaseModel
+from dotenv import load_dotenv
+from accounts import INITIAL_BALANCE
+from change_feed import ChangeFeed
+from database import read_transaction, read_account_version, read_log_since, read_transactions_page
+from ledger import empty_state, replay
+from market import get_share_prices
+from timeseries import get_portfolio_series
+
+load_dotenv(override=True)
+
+# The dashboard's single source of data. One thread refreshes every trader at once: the
+# balances, holdings and newest transactions of the accounts that changed, the value series
+# and new log lines are read in one read transaction, never the full history, so the panels
+# agree with each other. Holdings are priced in one batch, and a snapshot keeps its value and
+# priced_at until its account is repriced, so only the panels whose data changed re-render.
+# Pages and panels only ever read the latest snapshots, so the database and price load is the
+# same for one viewer or a hundred.
+
+PRICE_REFRESH_SECONDS = float(os.getenv("DASHBOARD_PRICE_REFRESH_SECONDS", "120"))
+# About one point per horizontal pixel of a trader's chart
+CHART_POINTS = int(os.getenv("DASHBOARD_CHART_POINTS", "400"))
+LOG_LINES = 13
+TRANSACTIONS_PAGE = 10
+
+
+class TraderSnapshot(BaseModel):
+    name: str
+    version: int
+    strategy: str
+    holdings: dict[str, int]
+    transactions: list[dict]
+    series: list[tuple[str, float]]
+    series_version: int
+    portfolio_value: float
+    profit_loss: float
+    log_lines: list[tuple[int, str, str, str]]
+    log_id: int
+    priced_at: float
+
+
+class SnapshotService(ChangeFeed):
+    """A ChangeFeed that refreshes the traders' snapshots before waking its subscribers."""
+
+    def __init__(self, names: list[str], price_refresh: float = PRICE_REFRESH_SECONDS, **kwargs):
+        super().__init__(names, **kwargs)
+        self.price_refresh = price_refresh
+        self.snapshots: dict[str, TraderSnapshot] = {}
+        self._accounts: dict[str, dict] = {}
+        self._series: dict[str, list[tuple[str, float]]] = {}
+        self._series_versions = {name: 0 for name in self.names}
+        self._transactions: dict[str, list[dict]] = {}
+        self._logs = {name: deque(maxlen=LOG_LINES) for name in self.names}
+        self._prices: dict[str, float] = {}
+        self._priced_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self.refreshes = 0
+        self.refresh_seconds: deque[float] = deque(maxlen=100)
+        self.refreshed_at = 0.0
+
+    def poll(self) -> bool:
+        changed = self._read_changes()
+        if not changed and time.time() - self._priced_at < self.price_refresh:
+            return False
+        self.refresh()
+        self._notify()
+        return True
+
+    def refresh(self) -> None:
+        with self._refresh_lock:
+            start = time.perf_counter()
+            reread = []
+            with read_transaction():
+                for name in self.names:
+                    account = self._accounts.get(name)
+                    if account is None or account["version"] != self.account_versions[name]:
+                        self._accounts[name] = self._read_account(name)
+                        self._transactions[name] = read_transactions_page(name, limit=TRANSACTIONS_PAGE)
+                        reread.append(name)
+                    series = get_portfolio_series(name, max_points=CHART_POINTS)
+                    if series != self._series.get(name):
+                        self._series[name] = series
+                        self._series_versions[name] += 1
+                    last_id = self._logs[name][-1][0] if self._logs[name] else 0
+                    self._logs[name].extend(read_log_since(name, last_id, limit=LOG_LINES))
+            # New log lines and series points reuse the last prices; every holding is repriced once
+            # per price_refresh, and an account that traded has its own holdings priced straight away
+            repriced = set(reread)
+            if time.time() - self._priced_at >= self.price_refresh:
+                symbols = {symbol for account in self._accounts.values() for symbol in account["holdings"]}
+                self._prices = get_share_prices(symbols)
+                self._priced_at = time.time()
+                repriced = set(self._accounts)
+            elif reread:
+                symbols = {symbol for name in reread for symbol in self._accounts[name]["holdings"]}
+                if symbols:
+                    self._prices.update(get_share_prices(symbols))
+            priced_at = time.time()
+            snapshots = {}
+            for name, account in self._accounts.items():
+                previous = self.snapshots.get(name)
+                if previous and name not in repriced:
+                    # Same holdings, same prices: carried forward so the value panel stays as it is
+                    portfolio_value, profit_loss = previous.portfolio_value, previous.profit_loss
+                    account_priced_at = previous.priced_at
+                else:
+                    portfolio_value = account["balance"] + sum(
+                        self._prices[symbol] * quantity for symbol, quantity in account["holdings"].items()
+                    )
+                    profit_loss = portfolio_value - account["net_invested"] - account["balance"]
+                    account_priced_at = priced_at
+                snapshots[name] = TraderSnapshot(
+                    name=name,
+                    version=account["version"],
+                    strategy=account["strategy"],
+                    holdings=account["holdings"],
+                    transactions=self._transactions[name],
+                    series=self._series[name],
+                    series_version=self._series_versions[name],
+                    portfolio_value=portfolio_value,
+                    profit_loss=profit_loss,
+                    log_lines=list(self._logs[name]),
+                    log_id=self._logs[name][-1][0] if self._logs[name] else 0,
+                    priced_at=account_priced_at,
+                )
+            self.snapshots = snapshots
+            self.refreshes += 1
+            self.refresh_seconds.append(time.perf_counter() - start)
+            self.refreshed_at = time.time()
+
+    @staticmethod
+    def _read_account(name: str) -> dict:
+        # From the ledger, as Account.get reads it: a snapshot and at most SNAPSHOT_EVERY events.
+        # Read only: a trader that has not started yet shows as a fresh account, it is not created
+        version = read_account_version(name) or 0
+        replayed = replay(name)
+        state = replayed[0] if replayed else empty_state(INITIAL_BALANCE)
+        return {"name": name, "version": version, **state}
+
+    def start(self) -> "SnapshotService":
+        if not self.snapshots:
+            self._read_changes()
+            self.refresh()
+        super().start()
+        return self
+
+    def get(self, name: str) -> TraderSnapshot:
+        return self.snapshots[name.lower()]
+
+    def stats(self) -> dict:
+        """Refresh timings over the last 100 refreshes, and how old the data being served is."""
+        timings = sorted(self.refresh_seconds)
+        return {
+            "refreshes": self.refreshes,
+            "last_refresh_ms": timings and self.refresh_seconds[-1] * 1000,
+            "p50_refresh_ms": timings and timings[len(timings) // 2] * 1000,
+            "max_refresh_ms": timings and timings[-1] * 1000,
+            "age_seconds": time.time() - self.refreshed_at if self.refreshed_at else None,
+            "price_age_seconds": time.time() - self._priced_at if self._priced_at else None,
+        }
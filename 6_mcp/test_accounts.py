@@ -0,0 +1,65 @@
+import json
+import os
+import tempfile
+
+import pytest
+
+# database.py opens ACCOUNTS_DB on import, so point it at a throwaway file first
+os.environ["ACCOUNTS_DB"] = os.path.join(tempfile.mkdtemp(), "test_accounts.db")
+
+import accounts
+from accounts import Account, Order
+
+
+def test_running_aggregates_match_a_full_recomputation(monkeypatch):
+    prices = {"AAPL": 100.0, "MSFT": 200.0, "NVDA": 50.0}
+    monkeypatch.setattr(accounts, "get_share_price", lambda symbol: prices[symbol])
+    monkeypatch.setattr(accounts, "get_share_prices", lambda symbols: {symbol: prices[symbol] for symbol in symbols})
+
+    account = Account.get("aggregates")
+    account.buy_shares("AAPL", 10, "open")
+    prices["AAPL"] = 120.0
+    account.buy_shares("AAPL", 5, "add")
+    account.sell_shares("AAPL", 8, "trim")
+    account.execute_batch([
+        Order(action="sell", symbol="AAPL", quantity=7, rationale="exit"),
+        Order(action="buy", symbol="MSFT", quantity=3, rationale="rotate"),
+        Order(action="buy", symbol="NVDA", quantity=4, rationale="rotate"),
+    ])
+    account.check_aggregates()
+
+    # The aggregates read back from the ledger agree as well
+    reloaded = Account.get("aggregates")
+    reloaded.check_aggregates()
+    assert reloaded.holdings == {"MSFT": 3, "NVDA": 4}
+    assert "AAPL" not in reloaded.cost_basis
+
+
+def test_history_is_read_only_when_used(monkeypatch):
+    prices = {"AAPL": 100.0, "MSFT": 200.0}
+    monkeypatch.setattr(accounts, "get_share_price", lambda symbol: prices[symbol])
+    monkeypatch.setattr(accounts, "get_share_prices", lambda symbols: {symbol: prices[symbol] for symbol in symbols})
+
+    account = Account.get("history")
+    account.buy_shares("AAPL", 1, "first")
+    account.buy_shares("MSFT", 1, "second")
+    account.buy_shares("AAPL", 1, "third")
+
+    reloaded = Account.get("history")
+    report = json.loads(reloaded.report("recent", max_transactions=2))
+    assert report["transaction_count"] == 3
+    assert [t["rationale"] for t in report["recent_transactions"]] == ["second", "third"]
+    assert reloaded._transactions is None and reloaded._values is None
+
+    assert [t.rationale for t in reloaded.transactions] == ["first", "second", "third"]
+    assert len(reloaded.portfolio_value_time_series) == 4
+
+    reloaded.reset("fresh start")
+    assert Account.get("history").list_transactions() == []
+
+
+def test_an_empty_batch_is_rejected():
+    account = Account.get("empty-batch")
+    with pytest.raises(ValueError):
+        account.execute_batch([])
+    assert account.version == Account.get("empty-batch").version
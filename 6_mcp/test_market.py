@@ -0,0 +1,23 @@
+from types import SimpleNamespace
+
+import market
+
+
+class StubClient:
+    def __init__(self, results):
+        self.results = results
+
+    def get_snapshot_all(self, market_type, tickers):
+        return self.results
+
+
+def test_a_snapshot_without_a_price_is_unpriced(monkeypatch):
+    results = [
+        SimpleNamespace(ticker="AAPL", min=SimpleNamespace(close=190.5), prev_day=SimpleNamespace(close=189.0)),
+        SimpleNamespace(ticker="MSFT", min=SimpleNamespace(close=0.0), prev_day=SimpleNamespace(close=410.0)),
+        SimpleNamespace(ticker="NEWCO", min=None, prev_day=None),
+        SimpleNamespace(ticker="HALTED", min=SimpleNamespace(close=None), prev_day=SimpleNamespace(close=None)),
+    ]
+    monkeypatch.setattr(market, "get_polygon_client", lambda: StubClient(results))
+    prices = market.fetch_share_prices_polygon_min(["AAPL", "MSFT", "NEWCO", "HALTED", "GONE"])
+    assert prices == {"AAPL": 190.5, "MSFT": 410.0, "NEWCO": 0.0, "HALTED": 0.0, "GONE": 0.0}
@@ -0,0 +1,22 @@
+import time
+from datetime import datetime, timezone
+
+import market_simulator
+
+
+def test_a_sped_up_clock_counts_from_the_run_start(monkeypatch):
+    # A day into a run at an hour per second, the simulated clock is 3600 days past its start
+    monkeypatch.setattr(market_simulator, "SPEED", 3600.0)
+    monkeypatch.setattr(market_simulator, "REAL_START", time.time() - 86400)
+    now = market_simulator.sim_now()
+    expected = datetime.fromtimestamp(market_simulator.SIM_START + 86400 * 3600, tz=timezone.utc)
+    assert abs((now - expected).total_seconds()) < 3600 * 60
+    assert now.year == 2033
+
+    market_simulator.is_market_open()
+    assert market_simulator.get_share_price("AAPL") > 0
+
+
+def test_the_real_time_clock_is_the_wall_clock(monkeypatch):
+    monkeypatch.setattr(market_simulator, "SPEED", 1.0)
+    assert abs(market_simulator.sim_now().timestamp() - time.time()) < 5
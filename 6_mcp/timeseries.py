@@ -0,0 +1,152 @@
+import os
+from datetime import datetime, timedelta
+from pydantic import BaseModel
+from dotenv import load_dotenv
+from database import ROLLUP_RESOLUTIONS, get_connection, transaction
+
+load_dotenv(override=True)
+
+# Portfolio values are kept at several resolutions: every raw point from report(), plus
+# open/high/low/close buckets of 5 minutes, an hour and a day maintained as points are
+# written (see database._append_rollups). Each resolution is kept for its own number of
+# days, and a query picks the finest resolution that covers its window in a few times
+# max_points, then downsamples it to max_points with Largest-Triangle-Three-Buckets, which
+# keeps the peaks and troughs a chart needs. A chart never loads more than OVERSAMPLE times
+# max_points rows however long the history.
+
+MAX_POINTS = int(os.getenv("PORTFOLIO_SERIES_MAX_POINTS", "500"))
+OVERSAMPLE = 4
+COMPACTION_BATCH = 5_000
+
+RAW = 0
+
+
+class SeriesRetention(BaseModel):
+    """Days to keep each resolution; 0 keeps it forever."""
+
+    raw_days: float = float(os.getenv("PORTFOLIO_RAW_RETENTION_DAYS", "1"))
+    five_minute_days: float = float(os.getenv("PORTFOLIO_5MIN_RETENTION_DAYS", "30"))
+    hourly_days: float = float(os.getenv("PORTFOLIO_HOURLY_RETENTION_DAYS", "365"))
+    daily_days: float = float(os.getenv("PORTFOLIO_DAILY_RETENTION_DAYS", "0"))
+
+    def days(self, resolution: int) -> float:
+        return {RAW: self.raw_days, 300: self.five_minute_days, 3600: self.hourly_days, 86400: self.daily_days}[resolution]
+
+    def cutoff(self, resolution: int, now: datetime | None = None) -> str:
+        """The oldest timestamp still kept at a resolution, "" if it is kept forever."""
+        days = self.days(resolution)
+        if not days:
+            return ""
+        return ((now or datetime.now()) - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def compact_portfolio_values(retention: SeriesRetention | None = None, now: datetime | None = None) -> int:
+    """Delete raw points and rollup buckets older than their retention; returns rows removed."""
+    retention = retention or SeriesRetention()
+    names = [row[0] for row in get_connection().execute("SELECT name FROM accounts")]
+    removed = 0
+    cutoff = retention.cutoff(RAW, now)
+    for name in names if cutoff else []:
+        while True:
+            with transaction() as conn:
+                deleted = conn.execute('''
+                    DELETE FROM portfolio_values WHERE id IN (
+                        SELECT id FROM portfolio_values WHERE name = ? AND datetime < ? LIMIT ?
+                    )
+                ''', (name, cutoff, COMPACTION_BATCH)).rowcount
+            removed += deleted
+            if deleted < COMPACTION_BATCH:
+                break
+    for resolution in ROLLUP_RESOLUTIONS:
+        cutoff = retention.cutoff(resolution, now)
+        if cutoff:
+            with transaction() as conn:
+                removed += conn.execute(
+                    "DELETE FROM portfolio_rollups WHERE resolution = ? AND bucket < ?", (resolution, cutoff)
+                ).rowcount
+    return removed
+
+
+def _seconds(timestamp: str) -> float:
+    return datetime.fromisoformat(timestamp).timestamp()
+
+
+def lttb(points: list[tuple[str, float]], threshold: int) -> list[tuple[str, float]]:
+    """
+    Downsample (datetime, value) points to threshold points with Largest-Triangle-Three-Buckets:
+    keep the first and last, and from each bucket in between the point that makes the largest
+    triangle with the point kept before it and the average of the next bucket.
+    """
+    if len(points) <= threshold:
+        return points
+    if threshold < 3:
+        return [points[0], points[-1]][:threshold]
+    xs = [_seconds(timestamp) for timestamp, _ in points]
+    ys = [value for _, value in points]
+    size = (len(points) - 2) / (threshold - 2)
+    sampled = [points[0]]
+    a = 0
+    for i in range(threshold - 2):
+        start, end = int(i * size) + 1, int((i + 1) * size) + 1
+        next_start, next_end = end, min(int((i + 2) * size) + 1, len(points))
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
+
+
+def get_portfolio_series(
+    name: str, start: str | None = None, end: str | None = None, max_points: int = MAX_POINTS
+) -> list[tuple[str, float]]:
+    """
+    Return at most max_points (datetime, value) points for an account between two
+    "%Y-%m-%d %H:%M:%S" timestamps, oldest first, from the finest resolution that
+    has the whole window in at most OVERSAMPLE * max_points, downsampled with lttb().
+    Rollup buckets report their closing value.
+    """
+    name = name.lower()
+    end = end or "9999"
+    conn = get_connection()
+    retention = SeriesRetention()
+    if not start:
+        # The whole history: it begins at the first daily bucket, which is never younger than the data
+        first = conn.execute(
+            "SELECT MIN(bucket) FROM portfolio_rollups WHERE name = ? AND resolution = ?", (name, ROLLUP_RESOLUTIONS[-1])
+        ).fetchone()[0]
+        start = first or ""
+    resolutions = (RAW, *ROLLUP_RESOLUTIONS)
+    for resolution in resolutions:
+        coarsest = resolution == resolutions[-1]
+        if start < retention.cutoff(resolution) and not coarsest:
+            continue
+        if resolution == RAW:
+            count = conn.execute(
+                "SELECT COUNT(*) FROM portfolio_values WHERE name = ? AND datetime BETWEEN ? AND ?", (name, start, end)
+            ).fetchone()[0]
+        else:
+            count = conn.execute('''
+                SELECT COUNT(*) FROM portfolio_rollups
+                WHERE name = ? AND resolution = ? AND bucket BETWEEN ? AND ?
+            ''', (name, resolution, start, end)).fetchone()[0]
+        if count > max_points * OVERSAMPLE and not coarsest:
+            continue
+        if resolution == RAW:
+            cursor = conn.execute('''
+                SELECT datetime, value FROM portfolio_values
+                WHERE name = ? AND datetime BETWEEN ? AND ?
+                ORDER BY datetime
+            ''', (name, start, end))
+        else:
+            cursor = conn.execute('''
+                SELECT bucket, close FROM portfolio_rollups
+                WHERE name = ? AND resolution = ? AND bucket BETWEEN ? AND ?
+                ORDER BY bucket
+            ''', (name, resolution, start, end))
+        return lttb(cursor.fetchall(), max_points)
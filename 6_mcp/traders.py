@@ -5,8 +5,7 @@ from agents import Agent, Tool, Runner, OpenAIChatCompletionsModel, trace
 from openai import AsyncOpenAI
 from dotenv import load_dotenv
 import os
-import json
-from agents.mcp import MCPServerStdio
+from inprocess_mcp import make_mcp_server
 from templates import (
     researcher_instructions,
     trader_instructions,
@@ -83,16 +82,16 @@ class Trader:
         )
         return self.agent
 
-    async def get_account_report(self) -> str:
-        account = await read_accounts_resource(self.name)
-        account_json = json.loads(account)
-        account_json.pop("portfolio_value_time_series", None)
-        return json.dumps(account_json)
+    async def get_account_report(self, session=None) -> str:
+        # The compact report: balances, holdings, P&L and only the latest transactions
+        return await read_accounts_resource(self.name, session)
 
     async def run_agent(self, trader_mcp_servers, researcher_mcp_servers):
         self.agent = await self.create_agent(trader_mcp_servers, researcher_mcp_servers)
-        account = await self.get_account_report()
-        strategy = await read_strategy_resource(self.name)
+        # The accounts server is the first of the trader's servers; reuse its open session
+        accounts_session = trader_mcp_servers[0].session
+        account = await self.get_account_report(accounts_session)
+        strategy = await read_strategy_resource(self.name, accounts_session)
         message = (
             trade_message(self.name, strategy, account)
             if self.do_trade
@@ -104,28 +103,31 @@ class Trader:
         async with AsyncExitStack() as stack:
             trader_mcp_servers = [
                 await stack.enter_async_context(
-                    MCPServerStdio(params, client_session_timeout_seconds=120)
+                    make_mcp_server(params, client_session_timeout_seconds=120)
                 )
                 for params in trader_mcp_server_params
             ]
             async with AsyncExitStack() as stack:
                 researcher_mcp_servers = [
                     await stack.enter_async_context(
-                        MCPServerStdio(params, client_session_timeout_seconds=120)
+                        make_mcp_server(params, client_session_timeout_seconds=120)
                     )
                     for params in researcher_mcp_server_params(self.name)
                 ]
                 await self.run_agent(trader_mcp_servers, researcher_mcp_servers)
 
-    async def run_with_trace(self):
+    async def run_with_trace(self, fleet=None):
         trace_name = f"{self.name}-trading" if self.do_trade else f"{self.name}-rebalancing"
         trace_id = make_trace_id(f"{self.name.lower()}")
         with trace(trace_name, trace_id=trace_id):
-            await self.run_with_mcp_servers()
+            if fleet:
+                await self.run_agent(fleet.trader_servers, fleet.researcher_servers(self.name))
+            else:
+                await self.run_with_mcp_servers()
 
-    async def run(self):
+    async def run(self, fleet=None):
+        """Run one trading or rebalancing session, on the floor's shared servers if given a fleet."""
         try:
-            await self.run_with_trace()
-        except Exception as e:
-            print(f"Error running trader {self.name}: {e}")
-        self.do_trade = not self.do_trade
+            await self.run_with_trace(fleet)
+        finally:
+            self.do_trade = not self.do_trade
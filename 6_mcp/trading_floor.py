@@ -1,9 +1,16 @@
 from traders import Trader
 from typing import List
 import asyncio
+import time
+from functools import partial
 from tracers import LogTracer
 from agents import add_trace_processor
-from market import is_market_open
+from market import is_market_open, clock_speed
+from retention import run_retention
+from server_fleet import ServerFleet
+from scheduler import TraderScheduler, sleep_until_next_tick
+from worker_pool import coordinate, start_worker
+from database import read_traders, write_traders
 from dotenv import load_dotenv
 import os
 
@@ -13,22 +20,44 @@ RUN_EVERY_N_MINUTES = int(os.getenv("RUN_EVERY_N_MINUTES", "60"))
 RUN_EVEN_WHEN_MARKET_IS_CLOSED = (
     os.getenv("RUN_EVEN_WHEN_MARKET_IS_CLOSED", "false").strip().lower() == "true"
 )
+# At most this many traders run at once (per worker, with workers); a run still going after
+# its deadline is cancelled
+MAX_CONCURRENT_TRADERS = int(os.getenv("MAX_CONCURRENT_TRADERS", "4"))
+TRADER_DEADLINE_MINUTES = float(os.getenv("TRADER_DEADLINE_MINUTES", str(RUN_EVERY_N_MINUTES)))
+# 0 runs every trader in this process; more runs them in that many worker processes
+TRADING_FLOOR_WORKERS = int(os.getenv("TRADING_FLOOR_WORKERS", "0"))
 USE_MANY_MODELS = os.getenv("USE_MANY_MODELS", "false").strip().lower() == "true"
 
-names = ["Warren", "George", "Ray", "Cathie"]
-lastnames = ["Patience", "Bold", "Systematic", "Crypto"]
+# The original four traders seed the traders table when it is empty; from then on the
+# table is the roster, so traders are added, disabled or moved to another model there
+default_names = ["Warren", "George", "Ray", "Cathie"]
+default_lastnames = ["Patience", "Bold", "Systematic", "Crypto"]
 
 if USE_MANY_MODELS:
-    model_names = [
+    default_model_names = [
         "gpt-4.1-mini",
         "deepseek-chat",
         "gemini-2.5-flash-preview-04-17",
         "grok-3-mini-beta",
     ]
-    short_model_names = ["GPT 4.1 Mini", "DeepSeek V3", "Gemini 2.5 Flash", "Grok 3 Mini"]
+    default_short_model_names = ["GPT 4.1 Mini", "DeepSeek V3", "Gemini 2.5 Flash", "Grok 3 Mini"]
 else:
-    model_names = ["gpt-4o-mini"] * 4
-    short_model_names = ["GPT 4o mini"] * 4
+    default_model_names = ["gpt-4o-mini"] * 4
+    default_short_model_names = ["GPT 4o mini"] * 4
+
+if not read_traders(enabled_only=False):
+    write_traders([
+        {"name": name, "lastname": lastname, "model_name": model_name, "short_model_name": short_model_name}
+        for name, lastname, model_name, short_model_name in zip(
+            default_names, default_lastnames, default_model_names, default_short_model_names
+        )
+    ])
+
+trader_configs = read_traders()
+names = [config["name"] for config in trader_configs]
+lastnames = [config["lastname"] for config in trader_configs]
+model_names = [config["model_name"] for config in trader_configs]
+short_model_names = [config["short_model_name"] for config in trader_configs]
 
 
 def create_traders() -> List[Trader]:
@@ -41,14 +70,56 @@ def create_traders() -> List[Trader]:
 async def run_every_n_minutes():
     add_trace_processor(LogTracer())
     traders = create_traders()
-    while True:
-        if RUN_EVEN_WHEN_MARKET_IS_CLOSED or is_market_open():
-            await asyncio.gather(*[trader.run() for trader in traders])
-        else:
-            print("Market is closed, skipping run")
-        await asyncio.sleep(RUN_EVERY_N_MINUTES * 60)
+    scheduler = TraderScheduler(
+        RUN_EVERY_N_MINUTES * 60 / clock_speed(),
+        MAX_CONCURRENT_TRADERS,
+        TRADER_DEADLINE_MINUTES * 60 / clock_speed(),
+    )
+    async with ServerFleet([trader.name for trader in traders]) as fleet:
+        try:
+            tick = time.time()
+            while True:
+                if RUN_EVEN_WHEN_MARKET_IS_CLOSED or is_market_open():
+                    await fleet.check()
+                    for trader in traders:
+                        await scheduler.submit(trader.name, partial(trader.run, fleet), tick)
+                else:
+                    print("Market is closed, skipping run")
+                await asyncio.to_thread(run_retention)
+                tick = await scheduler.sleep_until_next_tick()
+        finally:
+            await scheduler.stop()
+
+
+async def run_worker_pool(workers: int):
+    """Queue every trader's run each tick for a pool of worker processes, restarting any that die."""
+    period = RUN_EVERY_N_MINUTES * 60 / clock_speed()
+    deadline = TRADER_DEADLINE_MINUTES * 60 / clock_speed()
+    processes = [start_worker(worker, workers, period, MAX_CONCURRENT_TRADERS, deadline) for worker in range(workers)]
+    do_trade = {name: True for name in names}
+    try:
+        tick = time.time()
+        while True:
+            for worker, process in enumerate(processes):
+                if not process.is_alive():
+                    print(f"Worker {worker} exited with {process.exitcode}, restarting it")
+                    processes[worker] = start_worker(worker, workers, period, MAX_CONCURRENT_TRADERS, deadline)
+            if RUN_EVEN_WHEN_MARKET_IS_CLOSED or is_market_open():
+                await coordinate(names, workers, tick, do_trade, deadline)
+            else:
+                print("Market is closed, skipping run")
+            await asyncio.to_thread(run_retention)
+            tick = await sleep_until_next_tick(period)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
 
 
 if __name__ == "__main__":
     print(f"Starting scheduler to run every {RUN_EVERY_N_MINUTES} minutes")
-    asyncio.run(run_every_n_minutes())
+    if TRADING_FLOOR_WORKERS:
+        asyncio.run(run_worker_pool(TRADING_FLOOR_WORKERS))
+    else:
+        asyncio.run(run_every_n_minutes())
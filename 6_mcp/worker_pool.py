@@ -0,0 +1,136 @@
+import asyncio
+import multiprocessing
+import os
+import time
+import zlib
+from contextlib import AsyncExitStack
+from functools import partial
+from typing import Awaitable, Callable
+from dotenv import load_dotenv
+from agents import add_trace_processor
+from database import read_traders, enqueue_trader_jobs, claim_trader_jobs, finish_trader_job, expire_trader_jobs
+from scheduler import TraderScheduler, record_run
+from server_fleet import ServerFleet
+from tracers import LogTracer
+from traders import Trader
+
+load_dotenv(override=True)
+
+# Worker-pool mode spreads the traders over several processes. On each tick the coordinator
+# queues one run per trader in the trader_jobs table, and the worker that owns the trader
+# claims it and runs it under its own TraderScheduler. Each trader always goes to the same
+# worker, so only that worker opens its memory server and keeps its MCP sessions warm.
+# Workers share nothing but the database, so they can be restarted on their own.
+
+WORKER_POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", "1"))
+
+
+def shard(name: str, workers: int) -> int:
+    """The worker that runs a trader; stable across restarts, unlike hash()."""
+    return zlib.crc32(name.lower().encode()) % workers
+
+
+def enqueue(names: list[str], workers: int, scheduled_at: float, do_trade: dict[str, bool]) -> list[str]:
+    """Queue a tick's runs, alternating each trader between trading and rebalancing; returns the names skipped."""
+    queued = enqueue_trader_jobs(
+        [(name, do_trade[name], scheduled_at, shard(name, workers)) for name in names]
+    )
+    for name in queued:
+        do_trade[name] = not do_trade[name]
+    return [name for name in names if name not in queued]
+
+
+async def coordinate(names: list[str], workers: int, scheduled_at: float, do_trade: dict[str, bool], deadline: float) -> None:
+    # A run claimed more than a deadline and a poll ago belongs to a worker that died
+    abandoned = await asyncio.to_thread(expire_trader_jobs, time.time() - deadline - 2 * WORKER_POLL_SECONDS)
+    if abandoned:
+        print(f"Abandoned {abandoned} runs of workers that stopped")
+    skipped = await asyncio.to_thread(enqueue, names, workers, scheduled_at, do_trade)
+    for name in skipped:
+        print(f"Trader {name} is still queued or running, skipping this tick")
+        await record_run(name, scheduled_at, 0.0, 0.0, "skipped")
+
+
+async def _run_job(run: Callable[..., Awaitable], trader, job_id: int, trade: bool) -> None:
+    # Set here, once the run has started, so a skipped job never touches a run in flight
+    trader.do_trade = trade
+    try:
+        await run(trader)
+    finally:
+        await asyncio.to_thread(finish_trader_job, job_id)
+
+
+async def work(
+    worker: int,
+    workers: int,
+    period: float,
+    max_concurrent: int,
+    deadline: float,
+    run: Callable[..., Awaitable] | None = None,
+    until_idle: bool = False,
+) -> None:
+    """
+    Claim and run this worker's queued runs, up to max_concurrent at a time. Traders run on
+    the worker's ServerFleet unless given another run(trader); with until_idle, return once
+    the queue has nothing left for this worker.
+    """
+    traders = {
+        config["name"]: Trader(config["name"], config["lastname"], config["model_name"])
+        for config in read_traders()
+        if shard(config["name"], workers) == worker
+    }
+    scheduler = TraderScheduler(period, max_concurrent, deadline)
+    async with AsyncExitStack() as stack:
+        fleet = None
+        if run is None:
+            add_trace_processor(LogTracer())
+            fleet = await stack.enter_async_context(ServerFleet(list(traders)))
+            run = partial(_run_on_fleet, fleet)
+        try:
+            while True:
+                active = scheduler.active()
+                jobs = await asyncio.to_thread(claim_trader_jobs, worker, max_concurrent - active) if active < max_concurrent else []
+                if jobs and fleet and not active:
+                    await fleet.check()
+                for job in jobs:
+                    trader = traders.get(job["name"])
+                    if trader is None:
+                        print(f"Worker {worker} has no trader {job['name']}; restart the workers after adding traders")
+                        await asyncio.to_thread(finish_trader_job, job["id"], "unknown")
+                        continue
+                    job_run = partial(_run_job, run, trader, job["id"], job["trade"])
+                    if not await scheduler.submit(trader.name, job_run, job["scheduled_at"]):
+                        # The previous run is still recording its result; this job will not run
+                        await asyncio.to_thread(finish_trader_job, job["id"], "skipped")
+                if jobs:
+                    continue
+                if until_idle and not scheduler.active():
+                    return
+                if scheduler.active() >= max_concurrent:
+                    # Nothing can be claimed until a run finishes
+                    running = [task for task in scheduler.running.values() if not task.done()]
+                    await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                else:
+                    await asyncio.sleep(WORKER_POLL_SECONDS)
+        finally:
+            await scheduler.stop()
+
+
+async def _run_on_fleet(fleet, trader) -> None:
+    await trader.run(fleet)
+
+
+def run_worker(worker: int, workers: int, period: float, max_concurrent: int, deadline: float) -> None:
+    asyncio.run(work(worker, workers, period, max_concurrent, deadline))
+
+
+def start_worker(worker: int, workers: int, period: float, max_concurrent: int, deadline: float) -> multiprocessing.process.BaseProcess:
+    # Spawned rather than forked: a forked child would inherit this process's SQLite connections
+    process = multiprocessing.get_context("spawn").Process(
+        target=run_worker,
+        args=(worker, workers, period, max_concurrent, deadline),
+        name=f"trader-worker-{worker}",
+        daemon=True,
+    )
+    process.start()
+    return process